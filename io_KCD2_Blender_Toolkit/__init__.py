@@ -8,59 +8,101 @@ bl_info = {
     "category": "Import-Export",
 }
 
-import bpy
-from bpy_extras.io_utils import ImportHelper
-from bpy.types import AddonPreferences, PropertyGroup
-from bpy.props import StringProperty, IntProperty, FloatProperty, EnumProperty, BoolProperty
-from . import importers, ui, dependency
-from .handlers import material_handler, pak_handler
-from .bcry_exporter import register as bcry_register, unregister as bcry_unregister
+try:
+    import bpy
+except ImportError:
+    # Imported outside Blender (e.g. by PAK scan worker processes), only the bpy-free handlers are usable.
+    bpy = None
 
-class AddonSettings(AddonPreferences):
-    bl_idname = __name__
+if bpy is not None:
+    from bpy_extras.io_utils import ImportHelper
+    from bpy.types import AddonPreferences, PropertyGroup
+    from bpy.props import StringProperty, IntProperty, FloatProperty, EnumProperty, BoolProperty
+    from . import importers, ui, dependency
+    from .handlers import material_handler, pak_handler, conversion_cache
+    from .bcry_exporter import register as bcry_register, unregister as bcry_unregister
 
-    filepath: StringProperty(
-        name="KCD2 Data Directory",
-        description="The folder of the .paks",
-        subtype='FILE_PATH',
-        default=""
-    )
+    class AddonSettings(AddonPreferences):
+        bl_idname = __name__
 
-    texturesoutput: StringProperty(
-        name="Textures Path (for conversion)",
-        description="The folder to use for textures for conversion from PAK",
-        subtype='FILE_PATH',
-        default=""
-    )
+        filepath: StringProperty(
+            name="KCD2 Data Directory",
+            description="The folder of the .paks",
+            subtype='FILE_PATH',
+            default=""
+        )
 
-    enable_update_check: BoolProperty(
-        name="Enable Update Check",
-        description="Enable or disable automatic update checks on startup (from GitHub)",
-        default=True
-    )
+        texturesoutput: StringProperty(
+            name="Textures Path (for conversion)",
+            description="The folder to use for textures for conversion from PAK",
+            subtype='FILE_PATH',
+            default=""
+        )
 
-    def draw(self, context):
-        layout = self.layout
-        layout.prop(self, "enable_update_check")
-        layout.prop(self, "filepath")
-        layout.prop(self, "texturesoutput")
+        extraction_cache_size: IntProperty(
+            name="Extraction Cache Size (MB)",
+            description="Maximum disk space used to keep files extracted from the PAKs between imports",
+            default=2048,
+            min=64
+        )
 
-modules = [importers, dependency, ui, material_handler, pak_handler]
-classes = [AddonSettings]
+        converted_cache_size: IntProperty(
+            name="Conversion Cache Size (MB)",
+            description="Maximum disk space used to keep KCD2-Convertor results (.dae/.glb) between imports",
+            default=1024,
+            min=64,
+            update=lambda self, context: conversion_cache.set_cache_size(self.converted_cache_size)
+        )
 
-def register():
-    for module in modules:
-        module.register()
-    bcry_register()
-    for cls in classes:
-        bpy.utils.register_class(cls)
+        texture_workers: IntProperty(
+            name="Texture Conversion Processes",
+            description="How many KCDTextureExporter processes may run at once when importing an MTL",
+            default=4,
+            min=1,
+            max=16
+        )
 
-def unregister():
-    for module in reversed(modules):
-        module.unregister()
-    bcry_unregister()
-    for cls in classes:
-        bpy.utils.unregister_class(cls)
+        defer_texture_loading: BoolProperty(
+            name="Defer Texture Loading",
+            description="Only load diffuse textures while applying materials and load the other maps in the background afterwards",
+            default=False
+        )
+
+        enable_update_check: BoolProperty(
+            name="Enable Update Check",
+            description="Enable or disable automatic update checks on startup (from GitHub)",
+            default=True
+        )
+
+        def draw(self, context):
+            layout = self.layout
+            layout.prop(self, "enable_update_check")
+            layout.prop(self, "filepath")
+            layout.prop(self, "texturesoutput")
+            layout.prop(self, "extraction_cache_size")
+            layout.prop(self, "converted_cache_size")
+            layout.prop(self, "texture_workers")
+            layout.prop(self, "defer_texture_loading")
+
+    modules = [importers, dependency, ui, material_handler, pak_handler]
+    classes = [AddonSettings]
+
+    def register():
+        for module in modules:
+            module.register()
+        bcry_register()
+        for cls in classes:
+            bpy.utils.register_class(cls)
+        addon = bpy.context.preferences.addons.get(__name__)
+        if addon is not None:
+            conversion_cache.set_cache_size(addon.preferences.converted_cache_size)
+
+    def unregister():
+        for module in reversed(modules):
+            module.unregister()
+        bcry_unregister()
+        for cls in classes:
+            bpy.utils.unregister_class(cls)
 
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -35,7 +35,6 @@ from collections import OrderedDict
 from datetime import datetime
 from xml.dom.minidom import Document, Element, parse, parseString
 from ..handlers.skin_hidinggroups_patch import append_hiding_color_chunk
-#from ..handlers.collada_handler import process_hiding_groups_export
 
 import bmesh
 from bpy_extras.io_utils import ExportHelper
@@ -105,8 +104,7 @@ class CrytekDaeExporter:
         #for coll in utils.get_mesh_export_nodes(self._config.export_selected_nodes):
         #    for obj in coll.objects:
         #        if obj.type == 'MESH':
-        #            # Bake the hiding-mask layers
-        #            process_hiding_groups_export(obj)
+        #            # Needs the HidingMaskAlpha layer baked from HidingGroup1…8 (not implemented)
         #            # Only patch if the .skin was actually generated
         #            skin_path = os.path.join(export_dir, f"{obj.name}.skin")
         #            if skin_path.lower().endswith(".skin") and os.path.exists(skin_path):
@@ -0,0 +1,152 @@
+"""
+Command line access to the bpy-free parts of the toolkit (PAK scanning, extraction, conversion).
+Run from the folder that contains io_KCD2_Blender_Toolkit:
+
+    python -m io_KCD2_Blender_Toolkit.cli scan    --data <KCD2 Data> --filter "objects/characters/humans/*.skin"
+    python -m io_KCD2_Blender_Toolkit.cli extract --data <KCD2 Data> --filter "*.mtl" --out <dir>
+    python -m io_KCD2_Blender_Toolkit.cli convert --data <KCD2 Data> --filter "objects/weapons/*.cgf" --out <dir>
+
+For .blend output use headless.py through Blender instead.
+"""
+import os
+import sys
+import shutil
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from .handlers import cache_utils, pak_index, pak_reader, extraction_cache, skin_handler, cgf_handler
+
+
+def parse_shard(value):
+    """Parses 'INDEX/COUNT' (e.g. '0/4') for splitting one job across several processes."""
+    try:
+        shard_index, shard_count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("shard must look like INDEX/COUNT, e.g. 0/4")
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise argparse.ArgumentTypeError("shard index must be in [0, COUNT)")
+    return shard_index, shard_count
+
+
+def add_common_arguments(parser):
+    parser.add_argument("--data", required=True, help="KCD2 Data folder holding the .paks")
+    parser.add_argument("--filter", default="*", help="Glob over paths inside the paks ('*' crosses folders)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Parallel extractions/conversions")
+    parser.add_argument("--shard", type=parse_shard, default=(0, 1), help="Only handle every COUNT-th match, starting at INDEX")
+
+
+def select_entries(data_path, pattern, extensions, shard=(0, 1)):
+    """Returns (index, entries) for the pak members matching pattern, restricted to one shard."""
+    index = pak_index.get_pak_index(data_path)
+    if index is None:
+        raise SystemExit(f"Data path does not exist: {data_path}")
+    shard_index, shard_count = shard
+    return index, index.glob(pattern, extensions)[shard_index::shard_count]
+
+
+def output_path(out_dir, entry, ext=None):
+    """
+    Mirrors the pak folder layout below out_dir, optionally swapping the extension.
+    :raises ValueError: if the member path (e.g. from a mod pak) would land outside out_dir
+    """
+    out_dir = os.path.abspath(out_dir)
+    member = os.path.normpath(entry.path.replace("\\", "/"))
+    if ext is not None:
+        member = os.path.splitext(member)[0] + ext
+    path = os.path.abspath(os.path.join(out_dir, member))
+    if os.path.commonpath([out_dir, path]) != out_dir or path == out_dir:
+        raise ValueError(f"{entry.path} in {entry.pak} points outside the output folder")
+    return path
+
+
+def cmd_scan(args):
+    _, entries = select_entries(args.data, args.filter, args.ext, args.shard)
+    for entry in entries:
+        print(f"{entry.path}\t{entry.pak}\t{entry.file_size}")
+    print(f"{len(entries)} files", file=sys.stderr)
+
+
+def cmd_extract(args):
+    index, entries = select_entries(args.data, args.filter, args.ext, args.shard)
+
+    def extract(entry):
+        try:
+            out_path = output_path(args.out, entry)
+        except ValueError as e:
+            print(f"[CLI] Skipping {e}", file=sys.stderr)
+            return None
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        with open(out_path, 'wb') as dst:
+            pak_reader.copy_member(index.pak_path(entry), entry.offset, entry.compressed_size,
+                                   dst, cache_utils.COPY_BUFFER_SIZE)
+        return out_path
+
+    skipped = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        for out_path in pool.map(extract, entries):
+            if out_path is None:
+                skipped += 1
+            else:
+                print(out_path)
+    return 1 if skipped else 0
+
+
+def convert_entry(filepath, glb=False):
+    if filepath.lower().endswith(".skin"):
+        return skin_handler.skin_to_glb(filepath) if glb else skin_handler.skin_to_dae(filepath)
+    return cgf_handler.cgf_to_dae(filepath)
+
+
+def cmd_convert(args):
+    index, entries = select_entries(args.data, args.filter, ('.skin', '.cgf'), args.shard)
+    cache = extraction_cache.ExtractionCache()
+    filepaths = cache.extract_many(index, entries, args.workers)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        results = pool.map(lambda filepath: convert_entry(filepath, args.format == "glb"), filepaths)
+        for entry, converted in zip(entries, results):
+            if not converted:
+                failed += 1
+                print(f"[CLI] Failed to convert {entry.path}", file=sys.stderr)
+                continue
+            try:
+                out_path = output_path(args.out, entry, os.path.splitext(converted)[1])
+            except ValueError as e:
+                failed += 1
+                print(f"[CLI] Skipping {e}", file=sys.stderr)
+                continue
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+            shutil.copyfile(converted, out_path)
+            print(out_path)
+
+    cache.evict()
+    return 1 if failed else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="io_KCD2_Blender_Toolkit.cli", description="KCD2 PAK tools without Blender")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan = commands.add_parser("scan", help="List pak members matching a filter")
+    add_common_arguments(scan)
+    scan.add_argument("--ext", nargs="+", default=list(pak_index.INDEXED_EXTENSIONS), help="Extensions to include")
+    scan.set_defaults(func=cmd_scan)
+
+    extract = commands.add_parser("extract", help="Extract matching pak members, keeping their folders")
+    add_common_arguments(extract)
+    extract.add_argument("--ext", nargs="+", default=list(pak_index.INDEXED_EXTENSIONS), help="Extensions to include")
+    extract.add_argument("--out", required=True, help="Output folder")
+    extract.set_defaults(func=cmd_extract)
+
+    convert = commands.add_parser("convert", help="Convert matching .skin/.cgf files with KCD2-Convertor")
+    add_common_arguments(convert)
+    convert.add_argument("--out", required=True, help="Output folder")
+    convert.add_argument("--format", choices=("dae", "glb"), default="dae", help="glb only applies to .skin files")
+    convert.set_defaults(func=cmd_convert)
+
+    args = parser.parse_args(argv)
+    return args.func(args) or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+import bpy
+from concurrent.futures import ThreadPoolExecutor
+from . import skin_handler, cgf_handler, glb_handler, collada_handler
+
+BATCH_EXTENSIONS = ('.skin', '.cgf')
+
+
+class ImportSettings:
+    """Stand-in for the importer operator attributes that glb_handler and collada_handler read."""
+
+    def __init__(self, operator, model_type, import_normals):
+        self.operator = operator
+        self.model_type = model_type
+        self.import_normals = import_normals
+        self.glb_obj = None
+        self.dae_obj = None
+
+    def report(self, level, message):
+        self.operator.report(level, message)
+
+
+def convert_files(filepaths, max_workers=4):
+    """
+    Runs the external conversions for every file on a bounded worker pool.
+    :param filepaths: absolute .skin/.cgf paths
+    :param max_workers: number of converter processes allowed at once
+    :return: list of (filepath, glb_path, dae_path) in input order; failed outputs are None
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        jobs = []
+        for filepath in filepaths:
+            if filepath.lower().endswith(".skin"):
+                jobs.append((filepath, pool.submit(skin_handler.skin_to_glb, filepath), pool.submit(skin_handler.skin_to_dae, filepath)))
+            else:
+                jobs.append((filepath, None, pool.submit(cgf_handler.cgf_to_dae, filepath)))
+
+        return [
+            (filepath, glb_future.result() if glb_future else None, dae_future.result())
+            for filepath, glb_future, dae_future in jobs
+        ]
+
+
+def import_converted(context, operator, converted):
+    """
+    Feeds already converted files to the Blender importers one after another.
+    :param converted: output of convert_files
+    :return: (imported count, list of failed file names)
+    """
+    imported = 0
+    failed = []
+    collada_handler.begin_import()
+
+    for filepath, glb_path, dae_path in converted:
+        name = os.path.basename(filepath)
+        is_skin = filepath.lower().endswith(".skin")
+        settings = ImportSettings(operator, "skin" if is_skin else "cgf", import_normals=is_skin)
+
+        try:
+            if not dae_path or (is_skin and not glb_path):
+                raise Exception("conversion failed")
+
+            if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+                bpy.ops.object.mode_set(mode='OBJECT')
+            bpy.ops.object.select_all(action='DESELECT')
+
+            if is_skin:
+                settings.glb_obj = glb_handler.import_glb(glb_path, context, settings)
+                if not settings.glb_obj:
+                    raise Exception("no armature in glb")
+
+            settings.dae_obj = collada_handler.import_collada(dae_path, context, settings, filepath)
+            imported += 1
+            print(f"[BATCH] Imported {name}")
+        except Exception as e:
+            print(f"[BATCH] Failed to import {name}: {e}")
+            failed.append(name)
+
+    return imported, failed
+
+
+def batch_import(context, operator, filepaths, max_workers=4):
+    filepaths = [f for f in filepaths if f.lower().endswith(BATCH_EXTENSIONS)]
+    print(f"[BATCH] Converting {len(filepaths)} files with {max_workers} workers")
+    converted = convert_files(filepaths, max_workers)
+
+    imported, failed = import_converted(context, operator, converted)
+    if failed:
+        operator.report({'WARNING'}, f"Imported {imported} of {len(filepaths)} files. Failed: {', '.join(failed)}")
+    else:
+        operator.report({'INFO'}, f"Imported {imported} files")
+    return imported
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import threading
+
+# Buffer size for streaming pak members to disk.
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Bytes/files written since the last reset_disk_writes(), for the import logs.
+# Scratch writes are counted apart since the scratch folder can be in RAM (see get_scratch_dir).
+_disk_writes = {"bytes": 0, "files": 0, "scratch_bytes": 0}
+_disk_writes_lock = threading.Lock()
+
+
+def get_cache_dir(*parts):
+    """
+    Returns (and creates) a folder under the persistent KCD2Blender cache root.
+    Unlike Temp\\KCD2Blender this is never wiped by the importers.
+    :param parts: Optional sub-folders below the cache root
+    """
+    base = os.getenv("LOCALAPPDATA") or tempfile.gettempdir()
+    path = os.path.join(base, "KCD2Blender", "Cache", *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def get_scratch_dir(*parts):
+    """
+    Returns (and creates) a folder for short-lived files that only feed an external tool.
+    Uses KCD2BLENDER_SCRATCH if set, else a RAM backed /dev/shm where the OS has one,
+    else the temp folder. Windows has no RAM backed folder out of the box, so there the scratch
+    area is on disk unless KCD2BLENDER_SCRATCH points at a RAM drive (e.g. one made with ImDisk).
+    :param parts: Optional sub-folders below the scratch root
+    """
+    base = os.getenv("KCD2BLENDER_SCRATCH")
+    if not base:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else os.path.join(os.getenv("LOCALAPPDATA") or tempfile.gettempdir(), "Temp")
+        base = os.path.join(base, "KCD2BlenderScratch")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def record_disk_write(num_bytes, scratch=False):
+    with _disk_writes_lock:
+        _disk_writes["scratch_bytes" if scratch else "bytes"] += num_bytes
+        _disk_writes["files"] += 1
+
+
+def reset_disk_writes():
+    with _disk_writes_lock:
+        for key in _disk_writes:
+            _disk_writes[key] = 0
+
+
+def log_disk_writes(tag):
+    with _disk_writes_lock:
+        stats = dict(_disk_writes)
+    print(f"[{tag}] Wrote {stats['bytes'] / (1024 * 1024):.2f} MB to disk and "
+          f"{stats['scratch_bytes'] / (1024 * 1024):.2f} MB to scratch in {stats['files']} files")
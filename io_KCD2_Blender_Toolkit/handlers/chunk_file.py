@@ -0,0 +1,412 @@
+import os
+import mmap
+import struct
+from collections import namedtuple
+import numpy as np
+
+# Reader for CryEngine chunk files (.skin/.cgf/.chr) as shipped with KCD2 (file version 0x746).
+# bpy-free: decodes the geometry streams into NumPy arrays that native_handler feeds straight
+# into foreach_set. Anything not understood raises UnsupportedLayout so callers can fall back to
+# KCD2-Convertor.
+
+FILE_SIGNATURE = b"CrCh"
+FILE_VERSION = 0x746
+
+_FILE_HEADER = struct.Struct('<4s3I')        # signature, version, chunk count, chunk table offset
+_CHUNK_ENTRY = struct.Struct('<HHIII')       # type, version, id, size, offset
+
+# 0x746 stores the chunk type in 16 bits: the engine's ChunkType minus 0xCCCBF000.
+CHUNK_MESH = 0x1000
+CHUNK_NODE = 0x100B
+CHUNK_MTL_NAME = 0x1014
+CHUNK_DATA_STREAM = 0x1016
+CHUNK_MESH_SUBSETS = 0x1017
+CHUNK_COMPILED_BONES = 0x2000
+
+# ECgfStreamType, the slot order of the stream chunk ids in a mesh chunk.
+STREAM_POSITIONS = 0
+STREAM_NORMALS = 1
+STREAM_TEXCOORDS = 2
+STREAM_COLORS = 3
+STREAM_INDICES = 5
+STREAM_TANGENTS = 6
+STREAM_BONEMAPPING = 9
+STREAM_QTANGENTS = 12
+STREAM_P3S_C4B_T2S = 15
+STREAM_SLOTS = 16
+
+_MESH_HEADER = struct.Struct('<7i')          # flags, flags2, verts, indices, subsets, subsets chunk, vert anim chunk
+_STREAM_HEADER_800 = struct.Struct('<6i')    # flags, type, count, element size, reserved[2]
+_STREAM_HEADER_801 = struct.Struct('<7i')    # flags, type, stream index, count, element size, reserved[2]
+_SUBSETS_HEADER = struct.Struct('<4i')       # flags, count, reserved[2]
+_SUBSET = np.dtype([('first_index', '<i4'), ('num_indices', '<i4'), ('first_vertex', '<i4'),
+                    ('num_vertices', '<i4'), ('mat_id', '<i4'), ('radius', '<f4'), ('center', '<f4', 3)])
+_NODE = struct.Struct('<64s4i4x16f')         # name, object id, parent id, child count, material id, obsolete, transform
+_COMPILED_BONES_SKIP = 32
+_COMPILED_BONE = np.dtype([
+    ('controller_id', '<u4'),
+    ('physics', 'V208'),                     # BONE_PHYSICS_COMP for the alive and ragdoll LOD
+    ('mass', '<f4'),
+    ('world_to_bone', '<f4', (3, 4)),
+    ('bone_to_world', '<f4', (3, 4)),
+    ('name', 'S256'),
+    ('limb_id', '<i4'),
+    ('offset_parent', '<i4'),
+    ('num_children', '<i4'),
+    ('offset_child', '<i4'),
+])                                           # 584 bytes
+
+Chunk = namedtuple("Chunk", "type version id size offset")
+Node = namedtuple("Node", "id name object_id parent_id material_id transform")
+Bone = namedtuple("Bone", "name parent bone_to_world")
+
+
+class ChunkFileError(Exception):
+    pass
+
+
+class UnsupportedLayout(ChunkFileError):
+    """Raised for chunk or stream layouts the native reader does not decode."""
+
+
+class MeshData:
+    """Decoded geometry of one mesh chunk. Optional streams are None when the file has none."""
+
+    def __init__(self, chunk_id):
+        self.chunk_id = chunk_id
+        self.positions = None       # (N, 3) float32
+        self.normals = None         # (N, 3) float32
+        self.uvs = None             # (N, 2) float32, CryEngine orientation (v down)
+        self.colors = None          # (N, 4) uint8 RGBA
+        self.indices = None         # (M,) uint32, triangle list
+        self.bone_ids = None        # (N, 4) uint16
+        self.weights = None         # (N, 4) float32
+        self.subsets = None         # structured array, see _SUBSET
+
+
+class ChunkFile:
+    def __init__(self, filepath):
+        """
+        Memory-maps filepath and reads its header and chunk table. Use as a context manager (or call
+        close()) so the map is released; chunk_data() slices are only valid while the file is open.
+        :raises ChunkFileError: if the file is not a chunk file
+        :raises UnsupportedLayout: for chunk file versions other than 0x746
+        """
+        self.filepath = filepath
+        self._file = None
+        self._map = None
+        self.data = None
+        self._open()
+
+        try:
+            if len(self.data) < _FILE_HEADER.size:
+                raise ChunkFileError(f"{filepath} is too small to be a chunk file")
+            signature, self.version, _, _ = _FILE_HEADER.unpack_from(self.data, 0)
+            if signature != FILE_SIGNATURE:
+                raise ChunkFileError(f"{filepath} is not a CryEngine chunk file")
+            if self.version != FILE_VERSION:
+                raise UnsupportedLayout(f"Chunk file version {self.version:#x} is not supported")
+            self._read_table()
+        except Exception:
+            self.close()
+            raise
+
+    def _open(self):
+        self._file = open(self.filepath, 'rb')
+        if os.fstat(self._file.fileno()).st_size == 0:
+            self.data = memoryview(b"")
+            return
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self._map)
+
+    def _read_table(self):
+        _, _, chunk_count, table_offset = _FILE_HEADER.unpack_from(self.data, 0)
+        if table_offset + chunk_count * _CHUNK_ENTRY.size > len(self.data):
+            raise ChunkFileError(f"Chunk table of {self.filepath} runs past the end of the file")
+        self.table_offset = table_offset
+        self.chunks = [Chunk(*_CHUNK_ENTRY.unpack_from(self.data, table_offset + i * _CHUNK_ENTRY.size))
+                       for i in range(chunk_count)]
+        for chunk in self.chunks:
+            if chunk.offset + chunk.size > len(self.data):
+                raise ChunkFileError(f"Chunk {chunk.id} of {self.filepath} runs past the end of the file")
+        self.by_id = {chunk.id: chunk for chunk in self.chunks}
+
+    def close(self):
+        try:
+            if self.data is not None:
+                self.data.release()
+            if self._map is not None:
+                self._map.close()
+        except BufferError:
+            # Arrays still point into the map (e.g. while unwinding an error); it goes with them.
+            pass
+        self.data = None
+        self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def chunk_data(self, chunk):
+        """Zero-copy view of a chunk's bytes."""
+        return self.data[chunk.offset:chunk.offset + chunk.size]
+
+    def chunks_of_type(self, chunk_type):
+        return [chunk for chunk in self.chunks if chunk.type == chunk_type]
+
+    def _require(self, chunk_id, chunk_type):
+        chunk = self.by_id.get(chunk_id)
+        if chunk is None or chunk.type != chunk_type:
+            raise ChunkFileError(f"Chunk {chunk_id} is missing or not of type {chunk_type:#x}")
+        return chunk
+
+    # === Patching ===
+
+    def next_chunk_id(self):
+        return max((chunk.id for chunk in self.chunks), default=0) + 1
+
+    def append_chunk(self, chunk_type, version, data, chunk_id=None):
+        """
+        Adds a chunk by writing data and a new chunk table at the end of the file and pointing the
+        header at it. Existing chunks are not touched, so memory use does not depend on file size.
+        The previous chunk table stays behind as unreferenced bytes, so every append grows the file
+        by one table on top of data.
+        :return: the new Chunk
+        """
+        chunk_id = self.next_chunk_id() if chunk_id is None else chunk_id
+        chunks = list(self.chunks)
+
+        def write(f):
+            offset = _aligned_end(f)
+            f.write(data)
+            chunks.append(Chunk(chunk_type, version, chunk_id, len(data), offset))
+            self._write_table(f, chunks)
+
+        self._patch(write)
+        return self.by_id[chunk_id]
+
+    def replace_chunk(self, chunk_id, data):
+        """
+        Replaces the payload of chunk_id. Data that fits is written over the old payload, anything
+        larger goes to the end of the file; either way only the chunk's table entry is rewritten.
+        """
+        index = next((i for i, chunk in enumerate(self.chunks) if chunk.id == chunk_id), None)
+        if index is None:
+            raise ChunkFileError(f"No chunk with id {chunk_id}")
+        old = self.chunks[index]
+        table_offset = self.table_offset
+
+        def write(f):
+            if len(data) <= old.size:
+                offset = old.offset
+                f.seek(offset)
+            else:
+                offset = _aligned_end(f)
+            f.write(data)
+            f.seek(table_offset + index * _CHUNK_ENTRY.size)
+            f.write(_CHUNK_ENTRY.pack(old.type, old.version, old.id, len(data), offset))
+
+        self._patch(write)
+        return self.by_id[chunk_id]
+
+    def _patch(self, write):
+        # The map is dropped while writing, so the file can grow (Windows refuses that for mapped files).
+        self.close()
+        try:
+            with open(self.filepath, 'r+b') as f:
+                write(f)
+        finally:
+            self._open()
+            self._read_table()
+
+    @staticmethod
+    def _write_table(f, chunks):
+        table_offset = _aligned_end(f)
+        f.write(b"".join(_CHUNK_ENTRY.pack(*chunk) for chunk in chunks))
+        f.seek(8)
+        f.write(struct.pack('<2I', len(chunks), table_offset))
+
+    # === Nodes, materials and bones ===
+
+    def read_nodes(self):
+        nodes = []
+        for chunk in self.chunks_of_type(CHUNK_NODE):
+            if chunk.version not in (0x823, 0x824):
+                raise UnsupportedLayout(f"Node chunk version {chunk.version:#x}")
+            if chunk.size < _NODE.size:
+                raise ChunkFileError(f"Node chunk {chunk.id} is truncated")
+            name, object_id, parent_id, _, material_id, *matrix = _NODE.unpack_from(self.data, chunk.offset)
+            name = name.split(b"\0", 1)[0].decode('utf-8', 'replace')
+            transform = np.array(matrix, dtype=np.float32).reshape(4, 4)
+            nodes.append(Node(chunk.id, name, object_id, parent_id, material_id, transform))
+        return nodes
+
+    def read_material_name(self):
+        """Name of the .mtl the file refers to (without extension), or None."""
+        for chunk in self.chunks_of_type(CHUNK_MTL_NAME):
+            raw = bytes(self.data[chunk.offset:chunk.offset + min(128, chunk.size)])
+            return raw.split(b"\0", 1)[0].decode('utf-8', 'replace') or None
+        return None
+
+    def read_bones(self):
+        chunks = self.chunks_of_type(CHUNK_COMPILED_BONES)
+        if not chunks:
+            return []
+        chunk = chunks[0]
+        if chunk.version != 0x800:
+            raise UnsupportedLayout(f"Compiled bones chunk version {chunk.version:#x}")
+
+        count = (chunk.size - _COMPILED_BONES_SKIP) // _COMPILED_BONE.itemsize
+        records = np.frombuffer(self.data, dtype=_COMPILED_BONE, count=count,
+                                offset=chunk.offset + _COMPILED_BONES_SKIP)
+        bones = []
+        for i, record in enumerate(records):
+            parent = i + int(record['offset_parent']) if record['offset_parent'] else -1
+            bones.append(Bone(record['name'].split(b"\0", 1)[0].decode('utf-8', 'replace'), parent,
+                              record['bone_to_world'].copy()))
+        return bones
+
+    # === Geometry ===
+
+    def read_meshes(self):
+        """Returns a MeshData for every mesh chunk that carries render geometry."""
+        meshes = []
+        for chunk in self.chunks_of_type(CHUNK_MESH):
+            mesh = self.read_mesh(chunk)
+            if mesh is not None:
+                meshes.append(mesh)
+        return meshes
+
+    def read_mesh(self, chunk):
+        if chunk.version == 0x800:
+            stream_layers = 1
+        elif chunk.version == 0x801:
+            stream_layers = 8
+        else:
+            raise UnsupportedLayout(f"Mesh chunk version {chunk.version:#x}")
+
+        (flags, flags2, vert_count, index_count, subset_count,
+         subsets_id, vert_anim_id) = _MESH_HEADER.unpack_from(self.data, chunk.offset)
+        stream_ids = struct.unpack_from(f'<{STREAM_SLOTS * stream_layers}i', self.data,
+                                        chunk.offset + _MESH_HEADER.size)
+        # Only the first layer of each stream type is used (e.g. the first UV set).
+        streams = {slot: stream_ids[slot * stream_layers] for slot in range(STREAM_SLOTS)}
+
+        mesh = MeshData(chunk.id)
+        for slot, chunk_id in streams.items():
+            if chunk_id > 0:
+                self._decode_stream(mesh, self._require(chunk_id, CHUNK_DATA_STREAM))
+
+        if mesh.positions is None or mesh.indices is None:
+            # Physics-only or empty mesh chunk.
+            return None
+        if len(mesh.positions) != vert_count or len(mesh.indices) != index_count:
+            raise UnsupportedLayout(f"Mesh chunk {chunk.id} stream counts do not match its header")
+        if subsets_id > 0:
+            mesh.subsets = self._read_subsets(self._require(subsets_id, CHUNK_MESH_SUBSETS))
+
+        # Copy out of the map so the arrays outlive close().
+        for attr, value in vars(mesh).items():
+            if isinstance(value, np.ndarray):
+                setattr(mesh, attr, np.array(value))
+        return mesh
+
+    def _stream_array(self, chunk):
+        if chunk.version == 0x800:
+            _, stream_type, count, element_size, _, _ = _STREAM_HEADER_800.unpack_from(self.data, chunk.offset)
+            header_size = _STREAM_HEADER_800.size
+        elif chunk.version == 0x801:
+            _, stream_type, _, count, element_size, _, _ = _STREAM_HEADER_801.unpack_from(self.data, chunk.offset)
+            header_size = _STREAM_HEADER_801.size
+        else:
+            raise UnsupportedLayout(f"Data stream chunk version {chunk.version:#x}")
+
+        if header_size + count * element_size > chunk.size:
+            raise ChunkFileError(f"Data stream chunk {chunk.id} is truncated")
+        raw = np.frombuffer(self.data, dtype=np.uint8, count=count * element_size,
+                            offset=chunk.offset + header_size).reshape(count, element_size)
+        return stream_type, element_size, raw
+
+    def _decode_stream(self, mesh, chunk):
+        stream_type, size, raw = self._stream_array(chunk)
+
+        if stream_type == STREAM_POSITIONS and size in (12, 8):
+            mesh.positions = _as_floats(raw, size, 3)
+        elif stream_type == STREAM_NORMALS and size == 12:
+            mesh.normals = raw.view('<f4').reshape(-1, 3)
+        elif stream_type == STREAM_TEXCOORDS and size in (8, 4):
+            mesh.uvs = _as_floats(raw, size, 2)
+        elif stream_type == STREAM_COLORS and size == 4:
+            mesh.colors = raw
+        elif stream_type == STREAM_INDICES and size in (2, 4):
+            mesh.indices = raw.view('<u2' if size == 2 else '<u4').reshape(-1).astype(np.uint32)
+        elif stream_type == STREAM_TANGENTS and size == 16:
+            if mesh.normals is None:
+                mesh.normals = _normals_from_tangents(raw.view('<i2').reshape(-1, 2, 4))
+        elif stream_type == STREAM_QTANGENTS and size == 8:
+            if mesh.normals is None:
+                mesh.normals = _normals_from_qtangents(raw.view('<i2').reshape(-1, 4))
+        elif stream_type == STREAM_BONEMAPPING and size in (8, 12):
+            id_bytes = size - 4
+            mesh.bone_ids = raw[:, :id_bytes].copy().view('<u2' if size == 12 else 'u1').astype(np.uint16)
+            mesh.weights = raw[:, id_bytes:].astype(np.float32) / 255.0
+        elif stream_type == STREAM_P3S_C4B_T2S and size in (16, 20):
+            # Packed vertex: position (half4 or float3), BGRA colour, half2 UV.
+            position_bytes = size - 8
+            mesh.positions = _as_floats(raw[:, :position_bytes], position_bytes, 3)
+            mesh.colors = raw[:, position_bytes:position_bytes + 4][:, [2, 1, 0, 3]]
+            mesh.uvs = raw[:, position_bytes + 4:].copy().view('<f2').astype(np.float32)
+        elif stream_type in (STREAM_POSITIONS, STREAM_NORMALS, STREAM_TEXCOORDS, STREAM_COLORS,
+                             STREAM_INDICES, STREAM_BONEMAPPING, STREAM_P3S_C4B_T2S):
+            raise UnsupportedLayout(f"Stream type {stream_type} with element size {size}")
+        # Other streams (face maps, shape deformation, ...) are not needed for import.
+
+    def _read_subsets(self, chunk):
+        if chunk.version != 0x800:
+            raise UnsupportedLayout(f"Mesh subsets chunk version {chunk.version:#x}")
+        _, count, _, _ = _SUBSETS_HEADER.unpack_from(self.data, chunk.offset)
+        return np.frombuffer(self.data, dtype=_SUBSET, count=count, offset=chunk.offset + _SUBSETS_HEADER.size)
+
+
+def _aligned_end(f):
+    """Seeks to the end of f, padding it to 4 bytes, and returns that offset."""
+    end = f.seek(0, os.SEEK_END)
+    if end % 4:
+        f.write(b"\0" * (4 - end % 4))
+        end += 4 - end % 4
+    return end
+
+
+def _as_floats(raw, size, components):
+    """Decodes float32 (4 bytes per component) or float16 (2 bytes, maybe padded) vectors."""
+    raw = np.ascontiguousarray(raw)
+    if size == components * 4:
+        return raw.view('<f4').reshape(-1, components)
+    return raw.view('<f2').reshape(len(raw), -1)[:, :components].astype(np.float32)
+
+
+def _normals_from_tangents(tangents):
+    """tangents: (N, 2, 4) int16 tangent and bitangent, w holding the handedness."""
+    tangent = tangents[:, 0, :3].astype(np.float32) / 32767.0
+    bitangent = tangents[:, 1, :3].astype(np.float32) / 32767.0
+    normals = np.cross(tangent, bitangent) * np.where(tangents[:, 0, 3:4] < 0, -1.0, 1.0)
+    return _normalized(normals)
+
+
+def _normals_from_qtangents(qtangents):
+    """qtangents: (N, 4) int16 quaternion (x, y, z, w), the sign of w holding the handedness."""
+    x, y, z, w = (qtangents.astype(np.float32) / 32767.0).T
+    tangent = np.stack([1 - 2 * (y * y + z * z), 2 * (x * y + z * w), 2 * (x * z - y * w)], axis=1)
+    bitangent = np.stack([2 * (x * y - z * w), 1 - 2 * (x * x + z * z), 2 * (y * z + x * w)], axis=1)
+    normals = np.cross(tangent, bitangent) * np.where(w < 0, -1.0, 1.0)[:, None]
+    return _normalized(normals)
+
+
+def _normalized(vectors):
+    lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return (vectors / np.where(lengths > 0, lengths, 1)).astype(np.float32)
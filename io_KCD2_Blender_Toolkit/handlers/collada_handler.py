@@ -1,10 +1,23 @@
 import bpy
 import bmesh
+import numpy as np
 import xml.etree.ElementTree as ET
 import re
 import os
+from . import hiding_groups
 
-def import_collada(filepath, context, operator):
+# Names of the mesh objects created by the most recent import, for applying materials to all of them.
+last_import = []
+
+def begin_import():
+    """Called by the importers before they start, so last_import only holds the new import."""
+    last_import.clear()
+
+def import_collada(filepath, context, operator, source_path=None):
+    """
+    :param source_path: the .skin/.cgf the .dae was converted from; mtl_directory points next to it
+        (converted files may come straight from the conversion cache)
+    """
     # Import the COLLADA file
     bpy.ops.wm.collada_import(filepath=filepath, custom_normals=operator.import_normals)
     filename = os.path.splitext(os.path.basename(filepath))[0]
@@ -16,7 +29,7 @@ def import_collada(filepath, context, operator):
         glb_armature = operator.glb_obj
 
     for obj in bpy.context.selected_objects:
-        obj["mtl_directory"] = os.path.dirname(filepath)
+        obj["mtl_directory"] = os.path.dirname(source_path or filepath)
 
         if obj.type == 'ARMATURE' and glb_armature:
             armature_name = obj.name
@@ -26,6 +39,7 @@ def import_collada(filepath, context, operator):
         elif obj.type == 'MESH':
             mesh = obj.data
             imported_mesh = obj
+            last_import.append(obj.name)
 
             if glb_armature:
                 obj.parent = glb_armature
@@ -49,9 +63,9 @@ def import_collada(filepath, context, operator):
                     armature_modifier.use_vertex_groups = True
 
             fix_vertex_colors(mesh)
-            #Only runs hiding groups for .skin files. Don't think .cgf uses them.
-            #if getattr(operator, "model_type", "") == "skin":
-            #    process_hiding_groups_import(obj)
+            #Only runs hiding groups for .skin files (the option only exists on the skin importer).
+            if getattr(operator, "import_hiding_groups", False):
+                hiding_groups.import_hiding_groups(obj)
             fix_material_slots(obj, filepath)
             set_smooth(mesh)
             create_export_node(operator)
@@ -93,17 +107,29 @@ def set_smooth(mesh):
 
 
 
-def get_matched_materials(filepath):
-    tree = ET.parse(filepath)
-    root = tree.getroot()
+# Material names listed in each DAE, keyed by path and checked against (mtime, size), so files
+# holding many meshes are only parsed once.
+_dae_material_names = {}
+
+def get_dae_material_names(filepath):
+    stat = os.stat(filepath)
+    cached = _dae_material_names.get(filepath)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    root = ET.parse(filepath).getroot()
     ns = {'collada': 'http://www.collada.org/2005/11/COLLADASchema'}
+    names = [m.attrib.get('id').replace("-material", "") for m in root.findall('.//collada:material', ns)]
+    _dae_material_names[filepath] = ((stat.st_mtime_ns, stat.st_size), names)
+    return names
 
+def get_matched_materials(filepath):
     existing_materials = {mat.name: mat for mat in bpy.data.materials}
     
     return {
-        mat_id.replace("-material", ""): existing_materials[mat_id.replace("-material", "")]
-        for mat_id in (m.attrib.get('id') for m in root.findall('.//collada:material', ns))
-        if mat_id.replace("-material", "") in existing_materials
+        name: existing_materials[name]
+        for name in get_dae_material_names(filepath)
+        if name in existing_materials
     }
 
 def fix_material_slots(obj, filepath): 
@@ -152,26 +178,18 @@ def create_export_node(operator):
 def fix_vertex_colors(mesh):
     if mesh.vertex_colors:
         vc_layer = mesh.vertex_colors.active  # Get active vertex color layer
-        new_layer = mesh.color_attributes.new(name="alpha", type='BYTE_COLOR', domain='CORNER')  
-
-        bm = bmesh.new()
-        bm.from_mesh(mesh)
-        bm.loops.layers.color.verify()
-        color_layer = bm.loops.layers.color.get(vc_layer.name)
-        new_color_layer = bm.loops.layers.color.get(new_layer.name)
-
-        for face in bm.faces:
-            for loop in face.loops:
-                original_color = loop[color_layer]
-                alpha = original_color[3]
 
+        # Read before adding the new layer, adding one can reallocate the existing layer data.
+        colors = np.empty(len(mesh.loops) * 4, dtype=np.float32)
+        vc_layer.data.foreach_get("color", colors)
 
-                #srgb_alpha = linear_to_srgb(alpha)
+        alpha_colors = np.zeros((len(mesh.loops), 4), dtype=np.float32)
+        alpha_colors[:, 0] = colors[3::4]
+        alpha_colors[:, 3] = 1.0
 
-                loop[new_color_layer] = (alpha, 0, 0, 1)
-
-        bm.to_mesh(mesh)
-        bm.free()
+        # color_srgb stores the value as-is, like the BMesh loop layer used to.
+        new_layer = mesh.color_attributes.new(name="alpha", type='BYTE_COLOR', domain='CORNER')
+        new_layer.data.foreach_set("color_srgb", alpha_colors.ravel())
 
 def linear_to_srgb(linear):
     if linear <= 0.0031308:
@@ -184,75 +202,3 @@ def srgb_to_linear(srgb):
         return srgb / 12.92
     else:
         return ((srgb + 0.055) / 1.055) ** 2.4
-
-#Hiding groups thing - kill me now
-#def process_hiding_groups_import(obj):
-#    mesh = obj.data
-#    bm = bmesh.new()
-#    bm.from_mesh(mesh)
-#
-#    #grab the "alpha" from import if it exists
-#    vc_layer = bm.loops.layers.color.get("alpha")
-#    if not vc_layer:
-#        bm.free()
-#        return
-#    
-#    #8 groups - clears old weights first
-#    groups = []
-#    for i in range(8):
-#        name = f"HidingGroup{i+1}"
-#        vg = obj.vertex_groups.get(name) or obj.vertex_groups.new(name=name)
-#        vg.remove([v.index for v in mesh.vertices])
-#        groups.append(vg)
-#
-#    # assign each vertex to the group based off the bit mask
-#    for face in bm.faces:
-#        for loop in face.loops:
-#            vidix = loop.vert.index
-#            alpha = loop[vc_layer][0] #0.0-1.0
-#            mask = int(round(alpha * 255)) #0-255
-#            for bit, vg in enumerate(groups):
-#                if (mask >> bit) & 1:
-#                    vg.add([vidix], 1.0, 'REPLACE')
-#    bm.free()
-
-#def process_hiding_groups_export(obj):
-#    mesh = obj.data
-#
-#    # 1) Ensure an RGB layer (must NOT end in “alpha”)
-#    rgb_vcol = mesh.vertex_colors.get("HidingMaskRGB") \
-#            or mesh.vertex_colors.new(name="HidingMaskRGB")
-#    # 2) Ensure an Alpha layer (must end in “Alpha”)
-#    alpha_vcol = mesh.vertex_colors.get("HidingMaskAlpha") \
-#              or mesh.vertex_colors.new(name="HidingMaskAlpha")
-#
-#    # 3) Bake both layers in one BMesh pass
-#    bm = bmesh.new()
-#    bm.from_mesh(mesh)
-#    rgb_layer   = bm.loops.layers.color[rgb_vcol.name]
-#    alpha_layer = bm.loops.layers.color[alpha_vcol.name]
-#
-#    for face in bm.faces:
-#        for loop in face.loops:
-#            # Fill RGB with white
-#            loop[rgb_layer] = (1.0, 1.0, 1.0, 1.0)
-#
-#            # Compute 8-bit mask
-#            vidx = loop.vert.index
-#            mask = 0
-#            for bit in range(8):
-#                vg = obj.vertex_groups.get(f"HidingGroup{bit+1}")
-#                if vg:
-#                    try:
-#                        if vg.weight(vidx) > 0.5:
-#                            mask |= (1 << bit)
-#                    except RuntimeError:
-#                        pass
-#
-#            # Write mask into alpha
-#            a = mask / 255.0
-#            loop[alpha_layer] = (1.0, 1.0, 1.0, a)
-#
-#    # 4) Push back to the mesh and free
-#    bm.to_mesh(mesh)
-#    bm.free()
\ No newline at end of file
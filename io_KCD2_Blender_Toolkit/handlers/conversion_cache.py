@@ -0,0 +1,130 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from . import cache_utils, extraction_cache
+
+# Hit/miss counters for the current Blender session.
+_stats = {"hits": 0, "misses": 0}
+_stats_lock = threading.Lock()
+
+# Size limit of the Converted cache, kept in step with the converted_cache_size preference.
+DEFAULT_MAX_MB = 1024
+_max_bytes = DEFAULT_MAX_MB * 1024 * 1024
+
+
+def set_cache_size(max_mb):
+    global _max_bytes
+    _max_bytes = max_mb * 1024 * 1024
+
+
+def get_convertor_path():
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    parent_dir = os.path.dirname(current_dir)
+    return os.path.join(parent_dir, "External", "KCD2-Convertor", "KCD2-Convertor.exe")
+
+
+def get_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+
+def _hash_file(digest, path):
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+
+
+def _cache_key(convertor_path, input_file, flags):
+    """
+    Hashes the input (plus its .cgfm/.skinm companion, which the converter also reads), the converter
+    build and flags, and the stat of the .mtl next to the input, which the converter names materials from.
+    """
+    digest = hashlib.sha1()
+    stat = os.stat(convertor_path)
+    digest.update(f"{stat.st_size}|{stat.st_mtime_ns}|{' '.join(flags)}\n".encode('utf-8'))
+    _hash_file(digest, input_file)
+    companion = input_file + "m"
+    if os.path.isfile(companion):
+        digest.update(b"\ncompanion\n")
+        _hash_file(digest, companion)
+    mtl_path = os.path.splitext(input_file)[0] + ".mtl"
+    if os.path.isfile(mtl_path):
+        mtl_stat = os.stat(mtl_path)
+        digest.update(f"\nmtl|{mtl_stat.st_size}|{mtl_stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:24]
+
+
+def _record(hit):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+    stats = get_stats()
+    print(f"[CONVERT CACHE] {'Hit' if hit else 'Miss'} - hit rate {stats['hit_rate']:.0%} "
+          f"({stats['hits']}/{stats['hits'] + stats['misses']})")
+
+
+def run_convertor(input_file, output_file, flags=()):
+    """
+    Runs KCD2-Convertor.exe on input_file, or returns a previous result for identical input.
+    :param input_file: absolute path of the .skin/.cgf
+    :param output_file: where the converter should write the .dae/.glb
+    :param flags: extra converter flags such as "-glb"
+    :return: output_file, or the cached copy (same file name) on a cache hit; None if the conversion failed
+    """
+    convertor_path = get_convertor_path()
+    label = os.path.splitext(output_file)[1].lstrip(".").upper()
+
+    if not os.path.isfile(convertor_path):
+        print(f"Error: KCD2-Convertor.exe not found at '{convertor_path}'.")
+        return None
+
+    cached_output = os.path.join(
+        cache_utils.get_cache_dir("Converted", _cache_key(convertor_path, input_file, flags)),
+        os.path.basename(output_file)
+    )
+    if os.path.isfile(cached_output):
+        # Used in place rather than copied next to the input; the folder mtime is the LRU timestamp.
+        os.utime(os.path.dirname(cached_output))
+        _record(True)
+        print(f"{label} file reused from cache: {cached_output}")
+        return cached_output
+
+    command = [convertor_path, input_file, *flags, "-outputfile", output_file]
+
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, check=True)
+        print("KCD2-Convertor.exe executed successfully!")
+        print("STDOUT:")
+        print(result.stdout)
+        if os.path.isfile(output_file):
+            print(f"{label} file created: {output_file}")
+            cache_utils.record_disk_write(os.path.getsize(output_file))
+            # Unique temp name: several threads or imports may convert the same input at once.
+            fd, tmp_path = tempfile.mkstemp(suffix=".partial", dir=os.path.dirname(cached_output))
+            try:
+                with os.fdopen(fd, 'wb') as dst, open(output_file, 'rb') as src:
+                    shutil.copyfileobj(src, dst, cache_utils.COPY_BUFFER_SIZE)
+                    cache_utils.record_disk_write(dst.tell())
+                os.replace(tmp_path, cached_output)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            # Bounded and evicted like the extraction cache.
+            extraction_cache.ExtractionCache(_max_bytes, cache_utils.get_cache_dir("Converted")).evict(keep=os.path.dirname(cached_output))
+            _record(False)
+            return output_file
+        else:
+            print(f"{label} file was not created.")
+            return None
+    except subprocess.CalledProcessError as e:
+        print("An error occurred while running KCD2-Convertor.exe")
+        print("STDOUT:")
+        print(e.stdout)
+        print("STDERR:")
+        print(e.stderr)
+        return None
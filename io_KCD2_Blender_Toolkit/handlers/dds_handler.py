@@ -1,81 +1,258 @@
 import os
+import json
 import bpy
 import subprocess
-import zipfile
-import shutil
+from concurrent.futures import ThreadPoolExecutor
+from . import cache_utils, pak_index, pak_reader
+
+MANIFEST_NAME = "manifest.json"
+# What KCDTextureExporter writes for foo.dds with --separateGloss (foo_ddna.dds -> foo_ddna.tif + foo_ddna_alpha.tif).
+CONVERTED_SUFFIXES = (".tif", "_alpha.tif")
 
 class DDSHandler:
-    def __init__(self, textures_output, pak_path):
+    def __init__(self, textures_output, index, max_workers=4):
         """
-        :param textures_output: where Input/Output folders live
-        :param pak_path: full path to the .pak file
+        :param textures_output: where the Output folder lives
+        :param index: PakIndex of the game (and mod) paks to search for textures
+        :param max_workers: how many KCDTextureExporter processes may run at once
         """
-        self.input_folder = os.path.join(textures_output, "Input")
+        # Extracted .dds only feed KCDTextureExporter (which deletes them), so they go to the scratch area.
+        self.input_folder = cache_utils.get_scratch_dir("TextureInput")
         self.output_folder = os.path.join(textures_output, "Output")
-        self.pak_path = pak_path
+        self.index = index
+        self.max_workers = max(1, max_workers)
         # absolute path to your EXE
         self.exporter_exe = os.path.abspath(os.path.join(os.path.dirname(__file__),"..", "External", "KCDTextureExporter", "KCDTextureExporter.exe"))
         os.makedirs(self.input_folder, exist_ok=True)
         os.makedirs(self.output_folder, exist_ok=True)
 
+    def resolve_textures(self, texture_paths):
+        """
+        Finds the .dds parts for each texture of the MTL across all indexed paks.
+        :return: dict of MTL texture path -> list of PakEntries, for each texture that was found
+        """
+        families = {}
+        for tex in texture_paths:
+            # strip leading './' and the .tif suffix
+            name_root = os.path.splitext(os.path.basename(tex))[0].lower()
+            print(f"[IMPORT] Looking for DDS variants of: {name_root}")
+
+            family = select_dds_family(self.index.dds_family(name_root), tex)
+            if family:
+                families[tex] = family
+            else:
+                print(f"[WARN] No .dds found in any pak for: {tex}")
+        return families
+
     def extract_and_convert_textures(self, texture_paths, mtl_virtual_path):
         """
-        Extracts streamed .dds variants from the PAK and then runs the external converter.
+        Extracts streamed .dds variants from the PAKs and then runs the external converter.
+        Textures are split into shards, each extracted to its own Input subfolder and converted by
+        its own KCDTextureExporter process, so one shard converts while the next is extracting.
+        Each shard opens the paks it needs itself, so a pak may be opened once per shard.
         :param texture_paths: List of texture paths from MTL (e.g. './foo_diff.tif')
         :param mtl_virtual_path: Virtual path to the MTL in the PAK (unused here)
+        :return: dict of MTL texture path -> folder holding its converted files, for each texture found
         """
         print("[IMPORT] Starting DDS extraction from PAK...")
 
-        found_any = False
-        with zipfile.ZipFile(self.pak_path, 'r') as zip_ref:
-            members = zip_ref.namelist()
-
-            for tex in texture_paths:
-                # strip leading './' and the .tif suffix
-                base = os.path.basename(tex)
-                name_root = os.path.splitext(base)[0].lower()
-                print(f"[IMPORT] Looking for DDS variants of: {name_root}")
-
-                for member in members:
-                    lower = member.lower()
-                    # match base.dds or base.dds1, base.dds2a, etc.
-                    if f"{name_root}.dds" in lower:
-                        dst = os.path.join(self.input_folder, os.path.basename(member))
-                        with zip_ref.open(member) as src, open(dst, 'wb') as out:
-                            shutil.copyfileobj(src, out)
-                        print(f"[IMPORT] Extracted: {member} → {dst}")
-                        found_any = True
-
-        if not found_any:
+        families = self.resolve_textures(texture_paths)
+        if not families:
             print("[ERROR] No .dds textures were extracted from the PAK.")
+            return {}
+
+        manifest = self._load_manifest()
+        unique = {manifest_key(family): family for family in families.values()}
+        folders = {}
+        pending = {}
+        # The exporter names its outputs after the file stem only, so textures sharing a stem (from
+        # other folders or paks) would overwrite each other's files. The first one goes to Output,
+        # the others to an Output sub-folder named after their folder in the pak.
+        taken = set()
+        for key, family in unique.items():
+            outputs = manifest.get(key)
+            if outputs and all(os.path.isfile(os.path.join(self.output_folder, f)) for f in outputs):
+                print(f"[IMPORT] Already converted: {', '.join(outputs)}")
+                folders[key] = os.path.dirname(outputs[0])
+                taken.add((folders[key], output_stem(family).lower()))
+        for key, family in unique.items():
+            if key in folders:
+                continue
+            # Output may be on a case-insensitive file system
+            stem = output_stem(family).lower()
+            folder = "" if ("", stem) not in taken else os.path.dirname(pak_reader.normalize_path(main_dds(family).path))
+            taken.add((folder, stem))
+            folders[key] = folder
+            pending[key] = family
+        print(f"[IMPORT] {len(unique) - len(pending)} textures reused, {len(pending)} to convert")
+
+        if pending:
+            self._convert(manifest, pending, folders)
+        return {tex: os.path.join(self.output_folder, folders[manifest_key(family)]) if folders[manifest_key(family)]
+                else self.output_folder for tex, family in families.items()}
+
+    def _convert(self, manifest, pending, folders):
+        # All parts of one texture must land in the same shard, the exporter stitches them together,
+        # and a shard has a single output folder.
+        by_folder = {}
+        for key, family in pending.items():
+            by_folder.setdefault(folders[key], []).append(family)
+        root = by_folder.pop("", [])
+        shard_count = min(self.max_workers, len(root))
+        jobs = [("", root[i::shard_count]) for i in range(shard_count)] + list(by_folder.items())
+        print(f"[IMPORT] Converting {len(pending)} textures in {len(jobs)} shards")
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+            results = list(pool.map(self._extract_and_convert_shard, range(len(jobs)),
+                                    [families for _, families in jobs],
+                                    [os.path.join(self.output_folder, folder) for folder, _ in jobs]))
+        if not all(results):
+            print(f"[ERROR] {results.count(False)} of {len(jobs)} texture shards failed to convert")
+
+        for (folder, shard), converted in zip(jobs, results):
+            if converted:
+                for family in shard:
+                    self._record_outputs(manifest, family, folder)
+        self._save_manifest(manifest)
+
+    def _record_outputs(self, manifest, family, folder=""):
+        """Lists the converted files of family in manifest, relative to Output ('/'-separated)."""
+        stem = output_stem(family)
+        outputs = [f"{folder}/{stem}{suffix}" if folder else stem + suffix for suffix in CONVERTED_SUFFIXES]
+        outputs = [f for f in outputs if os.path.isfile(os.path.join(self.output_folder, f))]
+        if not outputs:
             return
+        for output in outputs:
+            cache_utils.record_disk_write(os.path.getsize(os.path.join(self.output_folder, output)))
+        # A texture with the same file name from another pak overwrote these outputs.
+        for key in [k for k, files in manifest.items() if set(files) & set(outputs)]:
+            del manifest[key]
+        manifest[manifest_key(family)] = outputs
+
+    def _load_manifest(self):
+        """Maps 'pak|member|crc' of each converted .dds to the files it produced in Output."""
+        manifest_path = os.path.join(self.output_folder, MANIFEST_NAME)
+        if not os.path.isfile(manifest_path):
+            return {}
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("textures", {})
+        except Exception as e:
+            print(f"[WARN] Ignoring unreadable texture manifest: {e}")
+            return {}
+
+    def _save_manifest(self, manifest):
+        manifest_path = os.path.join(self.output_folder, MANIFEST_NAME)
+        tmp_path = manifest_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": 1, "textures": manifest}, f, indent=1)
+            os.replace(tmp_path, manifest_path)
+        except Exception as e:
+            print(f"[WARN] Failed to write texture manifest: {e}")
 
-        # === Now convert all .dds in Input to final textures in Output ===
-        print("[IMPORT] Launching KCDTextureExporter.exe for conversion")
+    def _extract_and_convert_shard(self, shard_index, families, output_folder):
+        shard_folder = os.path.join(self.input_folder, f"shard_{shard_index}")
+        os.makedirs(shard_folder, exist_ok=True)
+        for f in os.listdir(shard_folder):
+            try:
+                os.remove(os.path.join(shard_folder, f))
+            except Exception as e:
+                print(f"[WARN] Could not delete {f}: {e}")
+
+        self._extract_entries([entry for family in families for entry in family], shard_folder)
+        return self._run_exporter(shard_folder, output_folder)
+
+    def _extract_entries(self, entries, folder):
+        # Each pak is opened once per shard and its members read in file order.
+        by_pak = {}
+        for entry in entries:
+            by_pak.setdefault(entry.pak, []).append(entry)
+        for pak_file, pak_entries in by_pak.items():
+            with open(self.index.pak_path(pak_entries[0]), 'rb') as pak:
+                for entry in sorted(pak_entries, key=lambda e: e.offset):
+                    dst = os.path.join(folder, os.path.basename(entry.path))
+                    with open(dst, 'wb') as out:
+                        written = pak_reader.copy_open_member(pak, entry.offset, entry.compressed_size,
+                                                              out, cache_utils.COPY_BUFFER_SIZE)
+                    cache_utils.record_disk_write(written, scratch=True)
+                    print(f"[IMPORT] Extracted: {entry.path} from {pak_file} → {dst}")
+
+    def _run_exporter(self, input_folder, output_folder):
+        """Converts all .dds in input_folder to final textures in output_folder. Returns True on success."""
+        os.makedirs(output_folder, exist_ok=True)
         cmd = [
             self.exporter_exe,
-            "--input", self.input_folder,
-            "--output", self.output_folder,
+            "--input", input_folder,
+            "--output", output_folder,
             "--separateGloss",
             "--deleteSource"
         ]
         print(f"[IMPORT] Running: {' '.join(cmd)}")
-        proc = subprocess.Popen(cmd,cwd=self.input_folder,stdout=subprocess.PIPE,stderr=subprocess.PIPE)
+        proc = subprocess.Popen(cmd,cwd=input_folder,stdout=subprocess.PIPE,stderr=subprocess.PIPE)
         out, err = proc.communicate()
-        if proc.returncode == 0:
-            print("[IMPORT] Conversion succeeded")
-            print(out.decode())
-
-            #Clean up the generated settings file from EXE after.
-            settings_file = os.path.join(self.input_folder, "Settings.xml")
-            if os.path.exists(settings_file):
-                try:
-                    os.remove(settings_file)
-                except Exception as e:
-                    print(f"[WARN] Could not remove Settings.xml: {e}")
-        else:
-            print("[ERROR] Conversion failed")
+        if proc.returncode != 0:
+            print(f"[ERROR] Conversion failed for {os.path.basename(input_folder)}")
             print(err.decode())
+            return False
+
+        print(f"[IMPORT] Conversion succeeded for {os.path.basename(input_folder)}")
+        print(out.decode())
+
+        #Clean up the generated settings file from EXE after.
+        settings_file = os.path.join(input_folder, "Settings.xml")
+        if os.path.exists(settings_file):
+            try:
+                os.remove(settings_file)
+            except Exception as e:
+                print(f"[WARN] Could not remove Settings.xml: {e}")
+        return True
+
+def main_dds(family):
+    """Returns the part of a split texture that carries the header (the plain .dds)."""
+    for entry in family:
+        if entry.path.lower().endswith(".dds"):
+            return entry
+    return family[0]
+
+
+def output_stem(family):
+    """File name KCDTextureExporter gives the outputs of a texture, without the CONVERTED_SUFFIXES."""
+    name = os.path.basename(main_dds(family).path)
+    return name[:name.lower().rfind(".dds")]
+
+
+def manifest_key(family):
+    entry = main_dds(family)
+    return f"{entry.pak}|{pak_reader.normalize_path(entry.path)}|{entry.crc}"
+
+
+def select_dds_family(candidates, texture_path):
+    """
+    Narrows the .dds parts sharing a stem down to one folder, preferring the folder the .mtl
+    points at, so two textures with the same file name in different folders are not mixed.
+    """
+    folders = {}
+    owners = {}
+    for entry in candidates:
+        path = pak_reader.normalize_path(entry.path)
+        folder = os.path.dirname(path)
+        # Candidates come highest priority pak first. A mod's copy of a texture shadows the base
+        # game's as a whole, so its parts are never mixed with base game mips; within one tier the
+        # parts may be spread over several paks and the first copy of each part wins.
+        tier = pak_index.pak_tier(entry.pak)
+        if owners.setdefault(folder, tier) != tier:
+            continue
+        folders.setdefault(folder, {}).setdefault(os.path.basename(path), entry)
+    folders = {folder: list(parts.values()) for folder, parts in folders.items()}
+    if len(folders) <= 1:
+        return next(iter(folders.values()), [])
+
+    wanted = os.path.dirname(pak_reader.normalize_path(texture_path)).lstrip("./")
+    for folder, entries in folders.items():
+        if wanted and (folder == wanted or folder.endswith("/" + wanted)):
+            return entries
+    return next(iter(folders.values()))
 
 # Registration
 classes = []
@@ -0,0 +1,108 @@
+import os
+import shutil
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from . import cache_utils, pak_reader
+
+DEFAULT_MAX_MB = 2048
+
+# Converter threads evict the Converted cache concurrently; one eviction at a time per process.
+_evict_lock = threading.Lock()
+
+
+class ExtractionCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, root=None):
+        """
+        Persistent store of extracted pak members. Each extraction gets its own folder named after
+        the (pak, member, CRC) of everything in it, so a folder's contents never go stale; converter
+        outputs written next to the extracted file live and die with it. Least recently used folders
+        are evicted once the cache grows past max_bytes.
+        :param max_bytes: size limit of the whole cache
+        :param root: cache folder, defaults to the KCD2Blender cache root
+        """
+        self.max_bytes = max_bytes
+        self.root = root or cache_utils.get_cache_dir("Extracted")
+
+    @staticmethod
+    def _key(entries):
+        digest = hashlib.sha1()
+        for entry in entries:
+            digest.update(f"{entry.pak}|{pak_reader.normalize_path(entry.path)}|{entry.crc:08x}\n".encode('utf-8'))
+        return digest.hexdigest()[:20]
+
+    def extract(self, index, entry, companions=(), evict=True):
+        """
+        Returns the path of entry extracted into its cache folder, extracting only on a miss.
+        :param index: PakIndex the entries came from
+        :param entry: PakEntry of the file to import
+        :param companions: PakEntries that must sit next to it, e.g. the .cgfm of a .cgf
+        :param evict: set False when extracting a batch, then call evict() once it has been consumed
+        """
+        entries = [entry, *companions]
+        folder = os.path.join(self.root, self._key(entries))
+        os.makedirs(folder, exist_ok=True)
+
+        for member in entries:
+            out_path = os.path.join(folder, os.path.basename(member.path))
+            if os.path.isfile(out_path) and os.path.getsize(out_path) == member.file_size:
+                print(f"[CACHE] Hit: {member.path}")
+                continue
+
+            tmp_path = out_path + ".partial"
+            with open(tmp_path, 'wb', buffering=0) as dst:
+                written = pak_reader.copy_member(index.pak_path(member), member.offset, member.compressed_size,
+                                                 dst, cache_utils.COPY_BUFFER_SIZE)
+            os.replace(tmp_path, out_path)
+            cache_utils.record_disk_write(written)
+            print(f"[CACHE] Extracted: {member.path} → {out_path}")
+
+        # Folder mtime doubles as the LRU timestamp.
+        os.utime(folder)
+        if evict:
+            self.evict(keep=folder)
+        return os.path.join(folder, os.path.basename(entry.path))
+
+    def extract_many(self, index, entries, max_workers=4):
+        """
+        Extracts a batch of .skin/.cgf entries (each .cgf with its .cgfm) on a thread pool.
+        Eviction is skipped; call evict() once the extracted files have been consumed.
+        :return: extracted paths in the order of entries
+        """
+        def extract(entry):
+            cgfm_entry = index.entry_for(entry.pak, entry.path + "m") if entry.ext == '.cgf' else None
+            return self.extract(index, entry, [cgfm_entry] if cgfm_entry else [], evict=False)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            return list(pool.map(extract, entries))
+
+    def evict(self, keep=None):
+        """Removes least recently used folders until the cache fits in max_bytes."""
+        with _evict_lock:
+            folders = []
+            total = 0
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                try:
+                    if not os.path.isdir(path):
+                        continue
+                    size = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+                    folders.append((os.path.getmtime(path), size, path))
+                except FileNotFoundError:
+                    # Removed while scanning (e.g. by another Blender instance).
+                    continue
+                total += size
+
+            for _, size, path in sorted(folders):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    shutil.rmtree(path)
+                    total -= size
+                    print(f"[CACHE] Evicted: {path}")
+                except FileNotFoundError:
+                    total -= size
+                except Exception as e:
+                    print(f"[WARN] Could not evict cache folder: {path} — {e}")
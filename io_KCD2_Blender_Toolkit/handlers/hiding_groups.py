@@ -0,0 +1,51 @@
+import numpy as np
+
+# Skins store up to 8 hiding groups as a bit mask in the vertex colour alpha: bit N set means the
+# vertex belongs to HidingGroup<N+1>. On import fix_vertex_colors copies that alpha into the red
+# channel of the "alpha" layer, which import_hiding_groups decodes.
+# There is no export side yet: the exporter's .skin patch step (bcry_exporter/export.py) is
+# disabled, and Blender has no bulk read for vertex group weights, so building the mask would be a
+# Python loop over every vertex's groups.
+
+GROUP_COUNT = 8
+
+
+def group_name(bit):
+    return f"HidingGroup{bit + 1}"
+
+
+def _loop_vertex_indices(mesh):
+    vertex_index = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", vertex_index)
+    return vertex_index
+
+
+def import_hiding_groups(obj):
+    """
+    Fills HidingGroup1…8 from the mask in the "alpha" layer, clearing old weights first.
+    A vertex is in a group if any of its loops has the group's bit set. Meshes whose alpha is the
+    same everywhere carry no mask (e.g. all 255) and are left alone.
+    """
+    mesh = obj.data
+    layer = mesh.color_attributes.get("alpha")
+    if layer is None or layer.domain != 'CORNER':
+        return
+
+    colors = np.empty(len(mesh.loops) * 4, dtype=np.float32)
+    layer.data.foreach_get("color_srgb", colors)
+    loop_masks = np.round(colors[0::4] * 255).astype(np.uint8)
+    if not len(loop_masks) or (loop_masks == loop_masks[0]).all():
+        print(f"[Hiding Groups] {obj.name}: alpha does not vary, no hiding groups imported")
+        return
+
+    masks = np.zeros(len(mesh.vertices), dtype=np.uint8)
+    np.bitwise_or.at(masks, _loop_vertex_indices(mesh), loop_masks)
+
+    all_vertices = list(range(len(mesh.vertices)))
+    for bit in range(GROUP_COUNT):
+        name = group_name(bit)
+        vg = obj.vertex_groups.get(name) or obj.vertex_groups.new(name=name)
+        vg.remove(all_vertices)
+        members = np.flatnonzero((masks >> bit) & 1)
+        if len(members):
+            vg.add(members.tolist(), 1.0, 'REPLACE')
@@ -1,30 +1,111 @@
 import bpy
 import os
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty
-import xml.etree.ElementTree as ET
+from bpy.props import StringProperty, EnumProperty
+from . import mtl_parser
+
+# Images loaded this session, keyed by (absolute path, is_data). A file used both as color and as
+# data gets one datablock per colorspace; everything else is shared between materials.
+_image_cache = {}
+_image_stats = {"loaded": 0, "reused": 0}
+
+# Image nodes waiting for their image when textures are deferred:
+# (material, node name, path, is_data, (group node name, input name) or None).
+_deferred_loads = []
+# How many deferred images are assigned per timer tick, and the delay between ticks (seconds).
+DEFERRED_BATCH = 4
+DEFERRED_INTERVAL = 0.1
+
+# Shared node group every applied material instantiates. Bump the version to rebuild it in old files.
+MATERIAL_TEMPLATE_NAME = "KCD2_Material"
+MATERIAL_TEMPLATE_VERSION = 1
+# .mtl texture Map -> KCD2_Material input
+TEXTURE_INPUTS = {"Diffuse": "Diffuse", "Bumpmap": "Normal", "Specular": "Specular"}
+
+# Which objects an .mtl is applied to; shared by Material_KCD2_Load and the pak .mtl browser.
+TARGET_ITEMS = [
+    ("ACTIVE", "Active Object", "Apply to the active object only"),
+    ("SELECTED", "Selected Meshes", "Apply to every selected mesh"),
+    ("LAST_IMPORT", "Last Import", "Apply to every mesh created by the last KCD2 import"),
+]
 
 class Material_KCD2_Load(bpy.types.Operator):
     bl_idname = "mtl.load_mtl"
     bl_label = "Apply Materials"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    target: EnumProperty(name="Apply To", items=TARGET_ITEMS, default="ACTIVE")
 
     def execute(self, context):
         file_path = context.scene.mtl_file_dropdown
-        active_object = bpy.context.view_layer.objects.active
+        objects = get_target_objects(context, self.target)
 
-        if not active_object:
-            self.report({"ERROR"}, "File not found")
+        if not objects:
+            self.report({"ERROR"}, "No mesh to apply the materials to")
             return {"CANCELLED"}
         
         if not os.path.isfile(file_path):
             self.report({"ERROR"}, "File not found")
             return {"CANCELLED"}
 
-        apply_materials_from_mtl(file_path, context)
+        prefs = context.preferences.addons["io_KCD2_Blender_Toolkit"].preferences
+        stats = apply_materials_from_mtl(file_path, context, defer_textures=prefs.defer_texture_loading, objects=objects)
+        self.report({"INFO"}, f"Applied to {len(objects)} objects. Loaded {stats['loaded']} images, {stats['reused']} loads avoided")
 
         return {"FINISHED"}
 
 
+def get_material_template():
+    """
+    Returns the KCD2_Material node group: Eevee Specular BSDF fed by Diffuse, Specular, a 0.3 strength
+    normal map and gloss inverted into roughness. Built once and reused by every material; unlinked
+    inputs fall back to the Eevee Specular defaults.
+    """
+    group = bpy.data.node_groups.get(MATERIAL_TEMPLATE_NAME)
+    if group is not None and group.get("kcd2_template_version") == MATERIAL_TEMPLATE_VERSION:
+        return group
+    if group is not None:
+        group.name = MATERIAL_TEMPLATE_NAME + "_old"
+
+    group = bpy.data.node_groups.new(MATERIAL_TEMPLATE_NAME, 'ShaderNodeTree')
+    group["kcd2_template_version"] = MATERIAL_TEMPLATE_VERSION
+    sockets = group.interface
+    sockets.new_socket("Diffuse", in_out='INPUT', socket_type='NodeSocketColor').default_value = (0.8, 0.8, 0.8, 1.0)
+    sockets.new_socket("Specular", in_out='INPUT', socket_type='NodeSocketColor').default_value = (0.03, 0.03, 0.03, 1.0)
+    sockets.new_socket("Normal", in_out='INPUT', socket_type='NodeSocketColor').default_value = (0.5, 0.5, 1.0, 1.0)
+    gloss = sockets.new_socket("Gloss", in_out='INPUT', socket_type='NodeSocketFloat')
+    gloss.default_value = 0.8
+    gloss.min_value, gloss.max_value = 0.0, 1.0
+    sockets.new_socket("BSDF", in_out='OUTPUT', socket_type='NodeSocketShader')
+
+    nodes = group.nodes
+    links = group.links
+    group_in = nodes.new(type="NodeGroupInput")
+    group_in.location = (-500, 0)
+    group_out = nodes.new(type="NodeGroupOutput")
+    group_out.location = (200, 0)
+
+    bsdf = nodes.new(type="ShaderNodeEeveeSpecular")
+    bsdf.location = (0, 0)
+    links.new(bsdf.outputs["BSDF"], group_out.inputs["BSDF"])
+    links.new(group_in.outputs["Diffuse"], bsdf.inputs["Base Color"])
+    links.new(group_in.outputs["Specular"], bsdf.inputs["Specular"])
+
+    normal_map = nodes.new(type="ShaderNodeNormalMap")
+    normal_map.inputs["Strength"].default_value = 0.3
+    normal_map.location = (-250, -200)
+    links.new(group_in.outputs["Normal"], normal_map.inputs["Color"])
+    links.new(normal_map.outputs["Normal"], bsdf.inputs["Normal"])
+
+    math_node = nodes.new(type="ShaderNodeMath")
+    math_node.operation = 'SUBTRACT'
+    math_node.inputs[0].default_value = 1.0
+    math_node.location = (-250, -400)
+    links.new(group_in.outputs["Gloss"], math_node.inputs[1])
+    links.new(math_node.outputs["Value"], bsdf.inputs["Roughness"])
+    return group
+
+
 def setup_material_nodes(mat):
     mat.use_nodes = True
     nodes = mat.node_tree.nodes
@@ -32,121 +113,199 @@ def setup_material_nodes(mat):
     
     for node in nodes:
         nodes.remove(node)
+    # Node names get reused, so pending loads for the old nodes must not land on the new ones.
+    _deferred_loads[:] = [item for item in _deferred_loads if item[0] != mat]
 
-    bsdf = nodes.new(type="ShaderNodeEeveeSpecular")
-    bsdf.location = (0, 0)
+    shader = nodes.new(type="ShaderNodeGroup")
+    shader.node_tree = get_material_template()
+    shader.location = (0, 0)
 
     output_node = nodes.new(type="ShaderNodeOutputMaterial")
     output_node.location = (200, 0)
-    links.new(bsdf.outputs["BSDF"], output_node.inputs["Surface"])
+    links.new(shader.outputs["BSDF"], output_node.inputs["Surface"])
 
-    return nodes, links, bsdf
+    return nodes, links, shader
 
 
-def load_texture(nodes, links, bsdf, texture_path, tex_type, texture_count):
-    """Loads a texture from a file and links it to the material."""
+def _cached_image(key):
+    image = _image_cache.get(key)
+    if image is None:
+        return None
+    try:
+        image.name
+    except ReferenceError:
+        # Removed by the user or an orphan purge since it was cached.
+        del _image_cache[key]
+        return None
+    return image
+
+
+def load_image(texture_path, is_data):
+    """
+    Returns the image datablock for texture_path in the given colorspace, loading the file
+    only if no datablock for it exists yet.
+    """
+    key = (os.path.normcase(os.path.abspath(texture_path)), is_data)
+    image = _cached_image(key)
+    if image is not None:
+        _image_stats["reused"] += 1
+        return image
+
+    image = bpy.data.images.load(texture_path, check_existing=True)
+    if image.users or _cached_image((key[0], not is_data)) is image:
+        if image.colorspace_settings.is_data != is_data:
+            # Already in use with the other colorspace, so it needs its own datablock.
+            image = bpy.data.images.load(texture_path, check_existing=False)
+            _image_stats["loaded"] += 1
+        else:
+            _image_stats["reused"] += 1
+    else:
+        _image_stats["loaded"] += 1
+    image.colorspace_settings.is_data = is_data
+    _image_cache[key] = image
+    return image
+
+
+def _assign_image(tex_node, material, texture_path, is_data, defer, links, socket):
+    """Loads the image into tex_node and links it to socket, or queues both for the deferred timer."""
+    if not defer:
+        tex_node.image = load_image(texture_path, is_data)
+        if socket is not None:
+            links.new(tex_node.outputs["Color"], socket)
+        return
+    tex_node.label = os.path.basename(texture_path)
+    # An image node without an image outputs black, so the link waits for the image and the
+    # group input keeps its default until then.
+    target = (socket.node.name, socket.name) if socket is not None else None
+    _deferred_loads.append((material, tex_node.name, texture_path, is_data, target))
+
+
+def _load_deferred_images():
+    """Timer callback: assigns a few queued images per tick so the UI stays responsive."""
+    for _ in range(min(DEFERRED_BATCH, len(_deferred_loads))):
+        material, node_name, texture_path, is_data, target = _deferred_loads.pop(0)
+        try:
+            node_tree = material.node_tree
+            tex_node = node_tree.nodes.get(node_name)
+        except (ReferenceError, AttributeError):
+            # Material was deleted (or lost its node tree) before we got to it.
+            continue
+        if tex_node is not None and tex_node.image is None:
+            tex_node.image = load_image(texture_path, is_data)
+            shader = node_tree.nodes.get(target[0]) if target else None
+            if shader is not None and target[1] in shader.inputs:
+                node_tree.links.new(tex_node.outputs["Color"], shader.inputs[target[1]])
+    if _deferred_loads:
+        return DEFERRED_INTERVAL
+    print(f"[MATERIAL] Deferred textures loaded ({_image_stats['loaded']} loaded, {_image_stats['reused']} reused)")
+    return None
+
+
+def schedule_deferred_loads():
+    if _deferred_loads and not bpy.app.timers.is_registered(_load_deferred_images):
+        bpy.app.timers.register(_load_deferred_images, first_interval=DEFERRED_INTERVAL)
+
+
+def reset_image_stats():
+    for key in _image_stats:
+        _image_stats[key] = 0
+
+
+def load_texture(nodes, links, shader, texture_path, tex_type, texture_count, material=None, defer=False):
+    """
+    Loads a texture from a file and links it to the KCD2_Material group node (shader).
+    With defer, every map but the diffuse gets an empty, unlinked image node whose image is
+    filled in and linked from a timer after the import returns (see schedule_deferred_loads).
+    """
     if not os.path.exists(texture_path):
         print(f"Texture not found: {texture_path}. Skipping.")
         return
-    
+    defer = defer and material is not None and tex_type != "Diffuse"
+    target = TEXTURE_INPUTS.get(tex_type)
+
     tex_node = nodes.new(type="ShaderNodeTexImage")
-    tex_node.image = bpy.data.images.load(texture_path)
-    tex_node.location = (-300, 0)
+    tex_node.location = (-300, -300 * texture_count)
+    _assign_image(tex_node, material, texture_path, tex_type == "Bumpmap", defer,
+                  links, shader.inputs[target] if target else None)
 
     if texture_path.endswith("_ddna.tif"):
         gloss_texture_path = texture_path.replace("_ddna.tif", "_ddna_alpha.tif") #Updated to work with the set up of KCDTextureExporter.
         if os.path.exists(gloss_texture_path):
             print(f"Found gloss map texture: {gloss_texture_path}")
             gloss_tex_node = nodes.new(type="ShaderNodeTexImage")
-            gloss_tex_node.image = bpy.data.images.load(gloss_texture_path)
-            gloss_tex_node.location = (-300, -200)
-            gloss_tex_node.image.colorspace_settings.is_data = True
-
-
-            math_node = nodes.new(type="ShaderNodeMath")
-            math_node.operation = 'SUBTRACT'
-            math_node.inputs[0].default_value = 1.0
-            math_node.location = (-100, -200)
-            links.new(gloss_tex_node.outputs["Color"], math_node.inputs[1])
-            links.new(math_node.outputs["Value"], bsdf.inputs["Roughness"])
-
-    if tex_type == "Diffuse":
-        tex_node.image.colorspace_settings.is_data = False
-        links.new(tex_node.outputs["Color"], bsdf.inputs["Base Color"])
-    elif tex_type == "Bumpmap":
-        tex_node.image.colorspace_settings.is_data = True
-        normal_map = nodes.new(type="ShaderNodeNormalMap")
-        normal_map.inputs["Strength"].default_value = 0.3
-        normal_map.location = (-100, -200)
-        links.new(tex_node.outputs["Color"], normal_map.inputs["Color"])
-        links.new(normal_map.outputs["Normal"], bsdf.inputs["Normal"])
-    elif tex_type == "Specular":
-        tex_node.image.colorspace_settings.is_data = False
-        links.new(tex_node.outputs["Color"], bsdf.inputs["Specular"])
+            gloss_tex_node.location = (-600, -300 * texture_count)
+            _assign_image(gloss_tex_node, material, gloss_texture_path, True, defer,
+                          links, shader.inputs["Gloss"])
+
+def get_target_objects(context, target):
+    """Resolves a TARGET_ITEMS value to the mesh objects to apply materials to."""
+    if target == "SELECTED":
+        return [obj for obj in context.selected_objects if obj.type == 'MESH']
+    if target == "LAST_IMPORT":
+        from .collada_handler import last_import
+        objects = (bpy.data.objects.get(name) for name in last_import)
+        return [obj for obj in objects if obj is not None and obj.type == 'MESH']
+    active_obj = context.view_layer.objects.active
+    return [active_obj] if active_obj and active_obj.type == 'MESH' else []
 
 def get_materials_from_object(obj):
     """Finds materials in Blender by pattern matching."""
     return [mat for mat in obj.data.materials]
 
-def apply_materials_from_mtl(filepath, context, texture_dir=None):
+def apply_materials_from_mtl(filepath, context, texture_dir=None, defer_textures=False, objects=None, texture_dirs=None):
     """
-    Applies materials from an extracted .mtl to the active object.
+    Applies materials from an extracted .mtl to the active object, or to every object in objects.
+    Materials shared between objects are only set up once.
     :param filepath: Path to the .mtl file
     :param context: Blender context
     :param texture_dir: Optional override directory to load textures from
+    :param defer_textures: Only load diffuse maps now, queue the rest for a background timer
+    :param objects: Optional mesh objects to apply to instead of the active object
+    :param texture_dirs: Optional per-texture directories (MTL texture path -> folder), ahead of texture_dir
+    :return: dict with the number of images "loaded" and "reused" (loads avoided)
     """
-    tree = ET.parse(filepath)
-    root = tree.getroot()
-
-    active_obj = context.view_layer.objects.active
-    found_materials = get_materials_from_object(active_obj)
+    reset_image_stats()
+    model = mtl_parser.parse_mtl(filepath)
 
-    print("found materials length =", len(found_materials))
-    for mat in found_materials:
-        print("material found in blender:", mat.name)
+    if objects is None:
+        objects = get_target_objects(context, "ACTIVE")
 
-    material_counter = 0
     # Choose where to look for textures
     base_dir = texture_dir if texture_dir else os.path.dirname(filepath)
 
-    if root.tag == 'Material' and not root.findall(".//SubMaterials"):
-        # single-material MTL
-        print("no submaterials")
-        mat = found_materials[material_counter]
-        nodes, links, bsdf = setup_material_nodes(mat)
-
-        texture_count = 0
-        for texture in root.findall(".//Texture"):
-            tex_file = texture.get("File", "").replace("\\", "/")
-            tex_type = texture.get("Map", "")
-            # always use basename so we ignore any "./" or subpaths
-            full_texture_path = os.path.join(base_dir, os.path.basename(tex_file))
-            print(f"Loading texture from: {full_texture_path}")
-            load_texture(nodes, links, bsdf, full_texture_path, tex_type, texture_count)
-            texture_count += 1
-
-    else:
-        # multi-material MTL
-        for mat_elem in root.findall(".//Material"):
-            mat_name = mat_elem.get("Name")
-            print("material found in .mtl:", mat_name)
-
-            if material_counter >= len(found_materials):
-                break
-
-            mat = found_materials[material_counter]
-            material_counter += 1
-
-            nodes, links, bsdf = setup_material_nodes(mat)
-            texture_count = 0
-
-            for texture in mat_elem.findall(".//Texture"):
-                tex_file = texture.get("File", "").replace("\\", "/")
-                tex_type = texture.get("Map", "")
-                full_texture_path = os.path.join(base_dir, os.path.basename(tex_file))
+    mtl_materials = mtl_parser.materials_to_apply(model)
+    name_index = mtl_parser.build_name_index(mtl_materials)
+    done = set()
+
+    for obj in objects:
+        found_materials = get_materials_from_object(obj)
+        print(f"found materials length on {obj.name} =", len(found_materials))
+
+        for slot_position, mat in enumerate(found_materials):
+            if mat is None or mat.name in done:
+                continue
+            position = mtl_parser.match_slot(mat.name, name_index, slot_position, len(mtl_materials))
+            if position is None:
+                print(f"[MATERIAL] No .mtl sub-material for slot {mat.name}")
+                continue
+            done.add(mat.name)
+            mtl_material = mtl_materials[position]
+            print(f"material found in .mtl: {mtl_material.name} -> {mat.name}")
+            nodes, links, shader = setup_material_nodes(mat)
+
+            for texture_count, texture in enumerate(t for t in mtl_material.textures if t.file):
+                # always use basename so we ignore any "./" or subpaths
+                texture_folder = texture_dirs.get(texture.file, base_dir) if texture_dirs else base_dir
+                full_texture_path = os.path.join(texture_folder, os.path.basename(texture.file))
                 print(f"Loading texture from: {full_texture_path}")
-                load_texture(nodes, links, bsdf, full_texture_path, tex_type, texture_count)
-                texture_count += 1
+                load_texture(nodes, links, shader, full_texture_path, texture.map, texture_count, mat, defer_textures)
+
+    print(f"[MATERIAL] Set up {len(done)} materials on {len(objects)} objects")
+    print(f"[MATERIAL] Loaded {_image_stats['loaded']} images, reused {_image_stats['reused']} (loads avoided)")
+    if _deferred_loads:
+        print(f"[MATERIAL] Deferred {len(_deferred_loads)} texture loads")
+        schedule_deferred_loads()
+    return dict(_image_stats)
 
 
 def get_textures_from_mtl(mtl_path):
@@ -161,13 +320,7 @@ def get_textures_from_mtl(mtl_path):
         return textures
 
     try:
-        tree = ET.parse(mtl_path)
-        root = tree.getroot()
-
-        for texture in root.findall(".//Texture"):
-            tex_path = texture.get("File", "").replace("\\", "/")
-            if tex_path:
-                textures.append(tex_path)
+        textures = mtl_parser.all_textures(mtl_parser.parse_mtl(mtl_path))
     except Exception as e:
         print(f"[ERROR] Failed to read MTL file: {e}")
 
@@ -185,5 +338,8 @@ def register():
     
 
 def unregister():
+    if bpy.app.timers.is_registered(_load_deferred_images):
+        bpy.app.timers.unregister(_load_deferred_images)
+    _deferred_loads.clear()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
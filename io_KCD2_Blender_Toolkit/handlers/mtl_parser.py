@@ -0,0 +1,102 @@
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+# Parsed form of a CryEngine .mtl, shared by the pak browser, the DDS handler and the material
+# applier so each file is read once per change. bpy-free.
+#   name/shader:    the Name and Shader attributes
+#   params:         every other attribute of the <Material> element (Diffuse, Specular, Opacity, ...)
+#   textures:       MtlTexture per <Textures>/<Texture>, in file order
+#   public_params:  attributes of <PublicParams>
+#   sub_materials:  MtlMaterial per direct <SubMaterials>/<Material> child
+MtlMaterial = namedtuple("MtlMaterial", "name shader params textures public_params sub_materials")
+MtlTexture = namedtuple("MtlTexture", "map file")
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _parse_material(elem):
+    params = {k: v for k, v in elem.attrib.items() if k not in ("Name", "Shader")}
+
+    textures = []
+    for textures_elem in elem.findall("Textures"):
+        for texture in textures_elem.findall("Texture"):
+            textures.append(MtlTexture(texture.get("Map", ""), texture.get("File", "").replace("\\", "/")))
+
+    public_params = elem.find("PublicParams")
+    sub_materials = [_parse_material(sub) for subs in elem.findall("SubMaterials") for sub in subs.findall("Material")]
+
+    return MtlMaterial(
+        elem.get("Name", ""),
+        elem.get("Shader", ""),
+        params,
+        textures,
+        dict(public_params.attrib) if public_params is not None else {},
+        sub_materials,
+    )
+
+
+def parse_mtl(filepath):
+    """
+    Returns the MtlMaterial for the root of filepath. Results are cached until the file's
+    mtime or size changes.
+    :raises OSError / ET.ParseError: if the file is missing or not valid XML
+    """
+    stat = os.stat(filepath)
+    key = os.path.normcase(os.path.abspath(filepath))
+    with _cache_lock:
+        cached = _cache.get(key)
+    if cached and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[1]
+
+    material = _parse_material(ET.parse(filepath).getroot())
+    with _cache_lock:
+        _cache[key] = ((stat.st_mtime_ns, stat.st_size), material)
+    return material
+
+
+def iter_materials(material):
+    """Yields material and all of its sub-materials, depth first."""
+    yield material
+    for sub in material.sub_materials:
+        yield from iter_materials(sub)
+
+
+def all_textures(material):
+    """Texture file paths used anywhere in the material tree, in file order (empty ones skipped)."""
+    return [texture.file for mat in iter_materials(material) for texture in mat.textures if texture.file]
+
+
+def materials_to_apply(material):
+    """The materials that map onto mesh slots: the sub-materials, or the root for a single-material file."""
+    return material.sub_materials or [material]
+
+
+def build_name_index(materials):
+    """Maps lower-cased material names to their position in materials (first one wins)."""
+    index = {}
+    for position, material in enumerate(materials):
+        index.setdefault(material.name.lower(), position)
+    return index
+
+
+def match_slot(slot_name, name_index, slot_position, material_count):
+    """
+    Returns the position of the sub-material for a Blender material slot, or None. Tries the full
+    name, the name without Blender's .001 suffix, the part after the converter's "<mtl>_mtl_"
+    prefix, then the converter's "materialNN" sub-material id, and finally the slot position.
+    """
+    name = slot_name.lower()
+    candidates = [name, re.sub(r'\.\d{3}$', '', name)]
+    candidates.append(candidates[-1].rsplit('_mtl_', 1)[-1])
+    for candidate in candidates:
+        if candidate in name_index:
+            return name_index[candidate]
+
+    match = re.search(r'material(\d+)$', candidates[1])
+    if match and int(match.group(1)) < material_count:
+        return int(match.group(1))
+    return slot_position if slot_position < material_count else None
@@ -0,0 +1,251 @@
+import bpy
+import os
+import struct
+import numpy as np
+from mathutils import Matrix
+from . import chunk_file, collada_handler, glb_handler, hiding_groups, mtl_parser, skin_handler
+
+# Builds Blender objects straight from a .skin/.cgf with chunk_file, skipping KCD2-Convertor and the
+# COLLADA round trip for the geometry. All arrays go in through foreach_set. read_model decodes and
+# checks the whole file first, so unreadable or inconsistent files raise chunk_file.ChunkFileError
+# before anything is added to the scene and the importers can fall back to the converter.
+# Skin armatures still come from the converter's .glb through glb_handler, so both import paths give
+# the bcry exporter the same bone axes, rolls and lengths.
+
+
+def read_model(filepath):
+    """Decodes everything needed for the import. Raises chunk_file.ChunkFileError for anything it cannot use."""
+    try:
+        with chunk_file.ChunkFile(filepath) as cry_file:
+            meshes = cry_file.read_meshes()
+            if not meshes:
+                raise chunk_file.UnsupportedLayout("No render geometry in the file (streamed to a .cgfm?)")
+            model = cry_file.read_material_name(), meshes, cry_file.read_nodes(), cry_file.read_bones()
+    except (struct.error, ValueError, IndexError) as e:
+        # Truncated or corrupt data surfaces as whatever struct/NumPy raise first.
+        raise chunk_file.ChunkFileError(f"Malformed chunk data: {e}") from e
+
+    validate_model(*model)
+    return model
+
+
+def validate_model(mtl_name, meshes, nodes, bones):
+    """Checks the cross references build_mesh/assign_weights/build_armature index with."""
+    for bone in bones:
+        if not -1 <= bone.parent < len(bones):
+            raise chunk_file.ChunkFileError(f"Bone {bone.name} has parent {bone.parent} of {len(bones)}")
+
+    for mesh_data in meshes:
+        vert_count = len(mesh_data.positions)
+        if len(mesh_data.indices) and mesh_data.indices.max() >= vert_count:
+            raise chunk_file.ChunkFileError(f"Mesh chunk {mesh_data.chunk_id} indexes past its {vert_count} vertices")
+        for attr in ("normals", "uvs", "colors", "bone_ids", "weights"):
+            value = getattr(mesh_data, attr)
+            if value is not None and len(value) != vert_count:
+                raise chunk_file.ChunkFileError(f"Mesh chunk {mesh_data.chunk_id} has {len(value)} {attr} for {vert_count} vertices")
+        if bones and mesh_data.bone_ids is not None:
+            used = mesh_data.bone_ids[mesh_data.weights > 0]
+            if len(used) and used.max() >= len(bones):
+                raise chunk_file.ChunkFileError(f"Mesh chunk {mesh_data.chunk_id} is weighted to bone {used.max()} of {len(bones)}")
+
+
+def node_matrices(nodes):
+    """
+    Local-to-root matrix per node chunk id, composing each node's transform with its parents'.
+    CryEngine matrices are row-vector (translation in the last row), so they are transposed first.
+    """
+    by_id = {node.id: node for node in nodes}
+    matrices = {}
+
+    def resolve(node, visiting):
+        if node.id in matrices:
+            return matrices[node.id]
+        matrix = Matrix(node.transform.T.tolist())
+        parent = by_id.get(node.parent_id)
+        if parent is not None and parent.id not in visiting:
+            matrix = resolve(parent, visiting | {node.id}) @ matrix
+        matrices[node.id] = matrix
+        return matrix
+
+    for node in nodes:
+        resolve(node, {node.id})
+    return matrices
+
+
+def import_native(filepath, context, operator):
+    """
+    Imports filepath with the native chunk reader. If building the scene fails part way, everything
+    created so far is removed again before the error is raised.
+    :return: the last mesh object created
+    """
+    mtl_name, meshes, nodes, bones = read_model(filepath)
+    filename = os.path.splitext(os.path.basename(filepath))[0]
+    collection = context.collection
+    material_names = get_material_names(filepath, mtl_name)
+    nodes_by_object = {node.object_id: node for node in nodes}
+    matrices = node_matrices(nodes)
+
+    # Like the converter path, only skins get an armature.
+    glb_filepath = convert_armature(filepath) if bones and filepath.lower().endswith(".skin") else None
+
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+
+    created = []
+    try:
+        armature = None
+        if glb_filepath:
+            armature = glb_handler.import_glb(glb_filepath, context, operator)
+            if armature is None:
+                raise RuntimeError(f"No armature in {os.path.basename(glb_filepath)}")
+            created.append(armature)
+        operator.glb_obj = armature
+        bpy.ops.object.select_all(action='DESELECT')
+
+        obj = None
+        for mesh_data in meshes:
+            node = nodes_by_object.get(mesh_data.chunk_id)
+            name = node.name if node else filename
+            mesh = build_mesh(name, mesh_data, material_names, getattr(operator, "import_normals", True))
+
+            obj = bpy.data.objects.new(name, mesh)
+            created.append(obj)
+            collection.objects.link(obj)
+            if node is not None:
+                obj.matrix_local = matrices[node.id]
+            if armature is not None:
+                obj.parent = armature
+                modifier = obj.modifiers.new(name="Armature", type='ARMATURE')
+                modifier.object = armature
+                modifier.use_vertex_groups = True
+                if mesh_data.bone_ids is not None:
+                    assign_weights(obj, mesh_data, bones)
+
+            obj["mtl_directory"] = os.path.dirname(filepath)
+            collada_handler.fix_vertex_colors(mesh)
+            if getattr(operator, "import_hiding_groups", False):
+                hiding_groups.import_hiding_groups(obj)
+            obj.select_set(True)
+            context.view_layer.objects.active = obj
+    except Exception:
+        remove_objects(created)
+        operator.glb_obj = None
+        raise
+
+    collada_handler.last_import.extend(o.name for o in created if o.type == 'MESH')
+    collada_handler.create_export_node(operator)
+    print(f"[NATIVE] Imported {len(meshes)} meshes and {len(bones)} bones from {os.path.basename(filepath)}")
+    return obj
+
+
+def remove_objects(objects):
+    """Drops the objects of a failed import together with their mesh/armature data."""
+    if bpy.context.object and bpy.context.object.mode != 'OBJECT':
+        bpy.ops.object.mode_set(mode='OBJECT')
+    for obj in reversed(objects):
+        data = obj.data
+        bpy.data.objects.remove(obj)
+        if isinstance(data, bpy.types.Mesh):
+            bpy.data.meshes.remove(data)
+        elif isinstance(data, bpy.types.Armature):
+            bpy.data.armatures.remove(data)
+
+
+def get_material_names(filepath, mtl_name):
+    """
+    Slot names per sub-material id, "<mtl>_mtl_<sub-material>" like the converter uses when the
+    .mtl next to the file can be read, else "<file>_materialNN".
+    """
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    candidates = [os.path.splitext(filepath)[0] + ".mtl"]
+    if mtl_name:
+        candidates.insert(0, os.path.join(os.path.dirname(filepath), os.path.basename(mtl_name) + ".mtl"))
+
+    for mtl_path in candidates:
+        if os.path.isfile(mtl_path):
+            try:
+                model = mtl_parser.parse_mtl(mtl_path)
+            except Exception as e:
+                print(f"[NATIVE] Could not read {mtl_path}: {e}")
+                continue
+            mtl_stem = os.path.splitext(os.path.basename(mtl_path))[0]
+            return lambda mat_id, subs=mtl_parser.materials_to_apply(model): (
+                f"{mtl_stem}_mtl_{subs[mat_id].name}" if mat_id < len(subs) else f"{stem}_material{mat_id}")
+    return lambda mat_id: f"{stem}_material{mat_id}"
+
+
+def build_mesh(name, mesh_data, material_names, import_normals=True):
+    positions = mesh_data.positions
+    indices = mesh_data.indices
+    face_count = len(indices) // 3
+    indices = indices[:face_count * 3]
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(positions))
+    mesh.vertices.foreach_set("co", np.ascontiguousarray(positions, dtype=np.float32).ravel())
+    mesh.loops.add(len(indices))
+    mesh.loops.foreach_set("vertex_index", indices.astype(np.int32))
+    mesh.polygons.add(face_count)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(indices), 3, dtype=np.int32))
+    mesh.polygons.foreach_set("use_smooth", np.ones(face_count, dtype=bool))
+
+    if mesh_data.subsets is not None and len(mesh_data.subsets):
+        # One slot per material id in use, in id order; faces get the index of their subset's slot.
+        mat_ids = np.unique(mesh_data.subsets['mat_id'])
+        for mat_id in mat_ids:
+            slot_name = material_names(int(mat_id))
+            mesh.materials.append(bpy.data.materials.get(slot_name) or bpy.data.materials.new(slot_name))
+        material_index = np.zeros(face_count, dtype=np.int32)
+        for subset in mesh_data.subsets:
+            first = subset['first_index'] // 3
+            material_index[first:first + subset['num_indices'] // 3] = np.searchsorted(mat_ids, subset['mat_id'])
+        mesh.polygons.foreach_set("material_index", material_index)
+
+    if mesh_data.uvs is not None:
+        uvs = mesh_data.uvs[indices].copy()
+        uvs[:, 1] = 1.0 - uvs[:, 1]
+        mesh.uv_layers.new(name="UVMap").data.foreach_set("uv", uvs.ravel())
+
+    if mesh_data.colors is not None:
+        colors = mesh_data.colors[indices].astype(np.float32) / 255.0
+        mesh.color_attributes.new(name="Col", type='BYTE_COLOR', domain='CORNER').data.foreach_set("color_srgb", colors.ravel())
+
+    mesh.update(calc_edges=True)
+    mesh.validate()
+
+    if import_normals and mesh_data.normals is not None:
+        if hasattr(mesh, "use_auto_smooth"):
+            mesh.use_auto_smooth = True
+        mesh.normals_split_custom_set_from_vertices(mesh_data.normals)
+    return mesh
+
+
+def assign_weights(obj, mesh_data, bones):
+    """Adds one vertex group per bone; vertices sharing a weight go in with a single add() call."""
+    vertex_ids = np.repeat(np.arange(len(mesh_data.bone_ids)), 4)
+    bone_ids = mesh_data.bone_ids.ravel().astype(np.int64)
+    weights = np.round(mesh_data.weights.ravel() * 255).astype(np.int64)
+    used = weights > 0
+
+    keys = bone_ids[used] * 256 + weights[used]
+    order = np.argsort(keys, kind='stable')
+    keys, vertex_ids = keys[order], vertex_ids[used][order]
+    unique_keys, starts = np.unique(keys, return_index=True)
+    ends = np.append(starts[1:], len(keys))
+
+    groups = {}
+    for key, start, end in zip(unique_keys.tolist(), starts.tolist(), ends.tolist()):
+        bone_id, weight = divmod(key, 256)
+        group = groups.get(bone_id)
+        if group is None:
+            name = bones[bone_id].name if bone_id < len(bones) else f"Bone{bone_id}"
+            group = groups[bone_id] = obj.vertex_groups.get(name) or obj.vertex_groups.new(name=name)
+        group.add(vertex_ids[start:end].tolist(), weight / 255.0, 'REPLACE')
+
+
+def convert_armature(filepath):
+    """Converts the .skin to .glb for its armature; bone orientation is glb_handler's business."""
+    glb_filepath = skin_handler.skin_to_glb(filepath)
+    if not glb_filepath:
+        raise RuntimeError("KCD2-Convertor could not convert the armature to glb")
+    return glb_filepath
@@ -2,10 +2,10 @@ import bpy
 import os
 import zipfile
 import shutil
-from . import material_handler, dds_handler
+from . import material_handler, dds_handler, pak_index, pak_reader, extraction_cache, batch_handler, cache_utils
 import xml.etree.ElementTree as ET
 from bpy.types import Operator
-from bpy.props import StringProperty, EnumProperty
+from bpy.props import StringProperty, EnumProperty, IntProperty, BoolProperty
 
 all_skins = []
 filtered_skins = []
@@ -14,109 +14,74 @@ filtered_cgf = []
 all_mtls = []
 filtered_mtls = []
 
-def scan_skin_files_from_paks(data_path):
-    skins = []
-    if not os.path.isdir(data_path):
-        print(f"[ERROR] Data path does not exist: {data_path}")
-        return skins
+def _scan_files_from_paks(data_path, ext, tag):
+    index = pak_index.get_pak_index(data_path)
+    if index is None:
+        return []
 
-    pak_files = [f for f in os.listdir(data_path) if f.lower().endswith('.pak')]
-    print(f"[SKIN SCAN] Found {len(pak_files)} .pak files")
+    print(f"[{tag} SCAN] Using index of {len(index.paks)} .pak files")
+    items = index.browse_items(ext)
+    print(f"[{tag} SCAN] Total {ext} files found: {len(items)}")
+    return items
 
-    for pak_file in pak_files:
-        pak_path = os.path.join(data_path, pak_file)
-        try:
-            with zipfile.ZipFile(pak_path, 'r') as zip_ref:
-                for file in zip_ref.namelist():
-                    if file.lower().endswith('.skin'):
-                        relative_path = os.path.normpath(file)
-                        display_name = os.path.basename(relative_path)
-                        skins.append((file, display_name, f"From: {pak_file}"))
-        except Exception as e:
-            print(f"[ERROR] Failed to read {pak_file}: {e}")
-
-    print(f"[SKIN SCAN] Total .skin files found: {len(skins)}")
-    return sorted(skins, key=lambda item: item[1].lower())
+def scan_skin_files_from_paks(data_path):
+    return _scan_files_from_paks(data_path, '.skin', "SKIN")
 
 def scan_cgf_files_from_paks(data_path):
-    cgf = []
-    if not os.path.isdir(data_path):
-        print(f"[ERROR] Data path does not exist: {data_path}")
-        return cgf
-
-    pak_files = [f for f in os.listdir(data_path) if f.lower().endswith('.pak')]
-    print(f"[CGF SCAN] Found {len(pak_files)} .pak files")
-
-    for pak_file in pak_files:
-        pak_path = os.path.join(data_path, pak_file)
-        try:
-            with zipfile.ZipFile(pak_path, 'r') as zip_ref:
-                for file in zip_ref.namelist():
-                    if file.lower().endswith('.cgf'):
-                        relative_path = os.path.normpath(file)
-                        display_name = os.path.basename(relative_path)
-                        cgf.append((file, display_name, f"From: {pak_file}"))
-        except Exception as e:
-            print(f"[ERROR] Failed to read {pak_file}: {e}")
-
-    print(f"[CGF SCAN] Total .cgf files found: {len(cgf)}")
-    return sorted(cgf, key=lambda item: item[1].lower())
+    return _scan_files_from_paks(data_path, '.cgf', "CGF")
 
 def scan_mtl_files_from_paks(data_path):
-    mtls = []
-    if not os.path.isdir(data_path):
-        print(f"[ERROR] Data path does not exist: {data_path}")
-        return mtls
+    return _scan_files_from_paks(data_path, '.mtl', "MTL")
 
+def _search_paks_for_suffix(target_mtl_name, data_path):
+    """Slow path: walk every pak member for a suffix match. Only used when the index misses."""
     pak_files = [f for f in os.listdir(data_path) if f.lower().endswith('.pak')]
-    print(f"[MTL SCAN] Found {len(pak_files)} .pak files")
+    print(f"[MTL EXTRACT] Index miss, searching '{target_mtl_name}' in {len(pak_files)} .pak files")
 
     for pak_file in pak_files:
         pak_path = os.path.join(data_path, pak_file)
         try:
             with zipfile.ZipFile(pak_path, 'r') as zip_ref:
                 for file in zip_ref.namelist():
-                    if file.lower().endswith('.mtl'):
-                        relative_path = os.path.normpath(file)
-                        display_name = os.path.basename(relative_path)
-                        mtls.append((file, display_name, f"From: {pak_file}"))
+                    file_norm = file.lower().replace("\\", "/")
+                    if file_norm.endswith(target_mtl_name):
+                        return file, zip_ref.read(file)
         except Exception as e:
             print(f"[ERROR] Failed to read {pak_file}: {e}")
-
-    print(f"[MTL SCAN] Total .mtl files found: {len(mtls)}")
-    return sorted(mtls, key=lambda item: item[1].lower())
+    return None, None
 
 def extract_mtl_from_paks(target_mtl_name, data_path):
     """Extract the first matching .mtl file from PAKs to LOCALAPPDATA Temp folder."""
-    temp_root = os.path.join(os.getenv("LOCALAPPDATA"), "Temp", "KCD2Blender", "MTL")
-    os.makedirs(temp_root, exist_ok=True)
+    temp_root = cache_utils.get_scratch_dir("MTL")
 
-    if not os.path.isdir(data_path):
-        print(f"[ERROR] Data path does not exist: {data_path}")
+    index = pak_index.get_pak_index(data_path)
+    if index is None:
         return None
 
     target_mtl_name = target_mtl_name.lower().replace("\\", "/")
-
-    pak_files = [f for f in os.listdir(data_path) if f.lower().endswith('.pak')]
-    print(f"[MTL EXTRACT] Looking for '{target_mtl_name}' in {len(pak_files)} .pak files")
-
-    for pak_file in pak_files:
-        pak_path = os.path.join(data_path, pak_file)
-        try:
-            with zipfile.ZipFile(pak_path, 'r') as zip_ref:
-                for file in zip_ref.namelist():
-                    file_norm = file.lower().replace("\\", "/")
-                    if file_norm.endswith(target_mtl_name):
-                        out_path = os.path.join(temp_root, os.path.basename(file))
-                        with zip_ref.open(file) as source, open(out_path, 'wb') as target:
-                            target.write(source.read())
-                        print(f"[MTL EXTRACT] Found and extracted: {file} → {out_path}")
-                        return out_path
-        except Exception as e:
-            print(f"[ERROR] Failed to read {pak_file}: {e}")
-
-    print(f"[MTL EXTRACT] No match found for {target_mtl_name}")
-    return None
+    print(f"[MTL EXTRACT] Looking for '{target_mtl_name}'")
+
+    entry = index.find(target_mtl_name)
+    if entry is not None:
+        file = entry.path
+        out_path = os.path.join(temp_root, os.path.basename(file))
+        with open(out_path, 'wb') as target:
+            written = pak_reader.copy_member(index.pak_path(entry), entry.offset, entry.compressed_size,
+                                             target, cache_utils.COPY_BUFFER_SIZE)
+        cache_utils.record_disk_write(written, scratch=True)
+    else:
+        file, data = _search_paks_for_suffix(target_mtl_name, data_path)
+        if file is None:
+            print(f"[MTL EXTRACT] No match found for {target_mtl_name}")
+            return None
+
+        out_path = os.path.join(temp_root, os.path.basename(file))
+        with open(out_path, 'wb') as target:
+            target.write(data)
+        cache_utils.record_disk_write(len(data), scratch=True)
+
+    print(f"[MTL EXTRACT] Found and extracted: {file} → {out_path}")
+    return out_path
 
 class KCD2_OT_browse_skin_files(Operator):
     bl_idname = "kcd2.browse_skin_files"
@@ -136,6 +101,12 @@ class KCD2_OT_browse_skin_files(Operator):
         items=lambda self, context: filtered_skins
     )
 
+    import_hiding_groups: BoolProperty(
+        name="Import Hiding Groups",
+        description="Decode the vertex colour alpha into the HidingGroup1-8 vertex groups",
+        default=False
+    )
+
     def _ensure_filter(self):
         global filtered_skins
         filter_text = self.filter_string.lower()
@@ -178,6 +149,7 @@ class KCD2_OT_browse_skin_files(Operator):
         layout.prop(self, "filter_string", text="Search")
         if filtered_skins:
             layout.prop(self, "selected_skin", text="")
+        layout.prop(self, "import_hiding_groups")
 
     def execute(self, context):
         if not self.selected_skin:
@@ -198,31 +170,25 @@ class KCD2_OT_browse_skin_files(Operator):
         try:
             prefs = context.preferences.addons["io_KCD2_Blender_Toolkit"].preferences
             data_path = prefs.filepath
-            pak_path = os.path.join(data_path, pak_filename)
+            cache_utils.reset_disk_writes()
+
+            index = pak_index.get_pak_index(data_path)
+            entry = index.entry_for(pak_filename, skin_virtual_path) if index else None
+            if entry is None:
+                self.report({'ERROR'}, f".skin file not found: {skin_virtual_path}")
+                return {'CANCELLED'}
 
-            # Use AppData\Local\Temp\KCD2Blender
+            # Use AppData\Local\Temp\KCD2Blender for the import log
             temp_root = os.path.join(os.getenv("LOCALAPPDATA"), "Temp", "KCD2Blender")
             os.makedirs(temp_root, exist_ok=True)
 
-            # Delete all previous files in temp folder
-            for file in os.listdir(temp_root):
-                file_path = os.path.join(temp_root, file)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.remove(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"[WARN] Could not delete temp item: {file} — {e}")
-
-            # Extract selected .skin file
-            extract_path = os.path.join(temp_root, os.path.basename(skin_virtual_path))
-            with zipfile.ZipFile(pak_path, 'r') as zip_ref:
-                with zip_ref.open(skin_virtual_path) as src, open(extract_path, 'wb') as dst:
-                    shutil.copyfileobj(src, dst)
+            # Extract selected .skin file (reused from the cache when already extracted)
+            cache = extraction_cache.ExtractionCache(prefs.extraction_cache_size * 1024 * 1024)
+            extract_path = cache.extract(index, entry)
 
             print(f"[IMPORT] Extracted: {extract_path}")
-            bpy.ops.import_scene.kcd2_skin('EXEC_DEFAULT', filepath=extract_path)
+            bpy.ops.import_scene.kcd2_skin('EXEC_DEFAULT', filepath=extract_path, import_hiding_groups=self.import_hiding_groups)
+            cache_utils.log_disk_writes("IMPORT")
 
             # Log import
             log_path = os.path.join(temp_root, "import_log.txt")
@@ -317,48 +283,31 @@ class KCD2_OT_browse_cgf_files(Operator):
         try:
             prefs = context.preferences.addons["io_KCD2_Blender_Toolkit"].preferences
             data_path = prefs.filepath
-            pak_path = os.path.join(data_path, pak_filename)
+            cache_utils.reset_disk_writes()
+
+            index = pak_index.get_pak_index(data_path)
+            entry = index.entry_for(pak_filename, cgf_virtual_path) if index else None
+            if entry is None:
+                print(f"[ERROR] .cgf file not found in the archive: {cgf_virtual_path}")
+                self.report({'ERROR'}, f".cgf file not found: {cgf_virtual_path}")
+                return {'CANCELLED'}
 
-            # Use AppData\Local\Temp\KCD2Blender
+            # Use AppData\Local\Temp\KCD2Blender for the import log
             temp_root = os.path.join(os.getenv("LOCALAPPDATA"), "Temp", "KCD2Blender")
             os.makedirs(temp_root, exist_ok=True)
 
-            # Delete all previous files in temp folder
-            for file in os.listdir(temp_root):
-                file_path = os.path.join(temp_root, file)
-                try:
-                    if os.path.isfile(file_path) or os.path.islink(file_path):
-                        os.remove(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"[WARN] Could not delete temp item: {file} — {e}")
-
-            # Extract selected .cgf file
-            extract_path = os.path.join(temp_root, os.path.basename(cgf_virtual_path))
+            # Check if .cgfm exists and extract it next to the .cgf
             cgfm_virtual_path = cgf_virtual_path.replace('.cgf', '.cgfm')
-            cgfm_extract_path = os.path.join(temp_root, os.path.basename(cgfm_virtual_path))
+            cgfm_entry = index.entry_for(pak_filename, cgfm_virtual_path)
+            if cgfm_entry is None:
+                print(f"[WARN] No matching .cgfm found for {cgf_virtual_path}")
 
-            with zipfile.ZipFile(pak_path, 'r') as zip_ref:
-                # Extract the .cgf file
-                if cgf_virtual_path in zip_ref.namelist():
-                    with zip_ref.open(cgf_virtual_path) as src, open(extract_path, 'wb') as dst:
-                        shutil.copyfileobj(src, dst)
-                    print(f"[IMPORT] Extracted .cgf: {extract_path}")
-                else:
-                    print(f"[ERROR] .cgf file not found in the archive: {cgf_virtual_path}")
-                    self.report({'ERROR'}, f".cgf file not found: {cgf_virtual_path}")
-                    return {'CANCELLED'}
-
-                # Check if .cgfm exists and extract it too
-                if cgfm_virtual_path in zip_ref.namelist():
-                    with zip_ref.open(cgfm_virtual_path) as src, open(cgfm_extract_path, 'wb') as dst:
-                        shutil.copyfileobj(src, dst)
-                    print(f"[IMPORT] Extracted .cgfm: {cgfm_extract_path}")
-                else:
-                    print(f"[WARN] No matching .cgfm found for {cgf_virtual_path}")
+            cache = extraction_cache.ExtractionCache(prefs.extraction_cache_size * 1024 * 1024)
+            extract_path = cache.extract(index, entry, [cgfm_entry] if cgfm_entry else [])
+            print(f"[IMPORT] Extracted .cgf: {extract_path}")
 
             bpy.ops.import_scene.kcd2_cgf('EXEC_DEFAULT', filepath=extract_path)
+            cache_utils.log_disk_writes("IMPORT")
 
             # Log import
             log_path = os.path.join(temp_root, "import_log.txt")
@@ -397,6 +346,13 @@ class KCD2_OT_browse_mtl_files(Operator):
         default=False
     )
 
+    target: EnumProperty(
+        name="Apply To",
+        description="Objects to apply the materials to",
+        items=material_handler.TARGET_ITEMS,
+        default="ACTIVE"
+    )
+
     def _ensure_filter(self):
         global filtered_mtls
         filter_text = self.filter_string.lower()
@@ -440,6 +396,7 @@ class KCD2_OT_browse_mtl_files(Operator):
         if filtered_mtls:
             layout.prop(self, "selected_mtl", text="")
         layout.prop(self, "import_textures")
+        layout.prop(self, "target")
 
     def execute(self, context):
         if not self.selected_mtl:
@@ -462,11 +419,16 @@ class KCD2_OT_browse_mtl_files(Operator):
             # === Load preferences and paths ===
             prefs = context.preferences.addons["io_KCD2_Blender_Toolkit"].preferences
             data_path = prefs.filepath
-            pak_path = os.path.join(data_path, pak_filename)
+            cache_utils.reset_disk_writes()
 
-            # === Prepare temp folder and extract .mtl ===
-            temp_root = os.path.join(os.getenv("LOCALAPPDATA"), "Temp", "KCD2Blender", "MTL")
-            os.makedirs(temp_root, exist_ok=True)
+            index = pak_index.get_pak_index(data_path)
+            entry = index.entry_for(pak_filename, self.selected_mtl) if index else None
+            if entry is None:
+                self.report({'ERROR'}, f".mtl file not found: {self.selected_mtl}")
+                return {'CANCELLED'}
+
+            # === Prepare scratch folder and extract .mtl ===
+            temp_root = cache_utils.get_scratch_dir("MTL")
             for f in os.listdir(temp_root):
                 fp = os.path.join(temp_root, f)
                 try:
@@ -478,9 +440,10 @@ class KCD2_OT_browse_mtl_files(Operator):
                     print(f"[WARN] Could not delete temp item: {f} — {e}")
 
             extract_path = os.path.join(temp_root, os.path.basename(self.selected_mtl))
-            with zipfile.ZipFile(pak_path, 'r') as zip_ref:
-                with zip_ref.open(self.selected_mtl) as src, open(extract_path, 'wb') as dst:
-                    shutil.copyfileobj(src, dst)
+            with open(extract_path, 'wb') as dst:
+                written = pak_reader.copy_member(index.pak_path(entry), entry.offset, entry.compressed_size,
+                                                 dst, cache_utils.COPY_BUFFER_SIZE)
+            cache_utils.record_disk_write(written, scratch=True)
             print(f"[IMPORT] Extracted .mtl to: {extract_path}")
 
             # === Handle the “Import Textures” toggle ===
@@ -503,22 +466,26 @@ class KCD2_OT_browse_mtl_files(Operator):
 
             # === Step 2: Extract & convert DDS ===
             print("[IMPORT] Running DDS Handler for extraction and conversion")
-            dds_inst = dds_handler.DDSHandler(prefs.texturesoutput, pak_path)
-            dds_inst.extract_and_convert_textures(found_textures, self.selected_mtl)
+            dds_inst = dds_handler.DDSHandler(prefs.texturesoutput, index, prefs.texture_workers)
+            texture_dirs = dds_inst.extract_and_convert_textures(found_textures, self.selected_mtl)
 
             # === Step 3: Apply materials from converted textures ===
-            print("[IMPORT] Applying materials from MTL to the active object")
-            active_obj = context.view_layer.objects.active
-            if not active_obj:
-                print("[ERROR] No active object found in context.")
+            print("[IMPORT] Applying materials from MTL to the target objects")
+            objects = material_handler.get_target_objects(context, self.target)
+            if not objects:
+                print("[ERROR] No mesh found to apply the materials to.")
             else:
                 material_handler.apply_materials_from_mtl(
                     extract_path,
                     context,
-                    texture_dir=dds_inst.output_folder
+                    texture_dir=dds_inst.output_folder,
+                    defer_textures=prefs.defer_texture_loading,
+                    objects=objects,
+                    texture_dirs=texture_dirs
                 )
 
             # === Step 4: Log the import ===
+            cache_utils.log_disk_writes("IMPORT")
             log_path = os.path.join(temp_root, "import_log.txt")
             with open(log_path, "a") as log_file:
                 from datetime import datetime
@@ -531,9 +498,65 @@ class KCD2_OT_browse_mtl_files(Operator):
             self.report({'ERROR'}, f"Import failed: {e}")
             return {'CANCELLED'}
 
+class KCD2_OT_batch_import_paks(Operator):
+    bl_idname = "kcd2.batch_import_paks"
+    bl_label = "Batch Import from PAKs"
+    bl_description = "Import every .skin/.cgf in the Data PAKs whose path matches a pattern"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    pattern: StringProperty(
+        name="Path Pattern",
+        description="Pattern over paths inside the PAKs, e.g. objects/characters/humans/*.skin",
+        default="objects/characters/humans/*.skin"
+    )
+
+    max_workers: IntProperty(
+        name="Parallel Conversions",
+        description="Number of extractions/converter processes to run at once",
+        default=4,
+        min=1,
+        max=32
+    )
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self, width=400)
+
+    def execute(self, context):
+        try:
+            prefs = context.preferences.addons["io_KCD2_Blender_Toolkit"].preferences
+            data_path = prefs.filepath
+        except Exception as e:
+            self.report({'ERROR'}, f"Failed to load addon prefs: {e}")
+            return {'CANCELLED'}
+
+        index = pak_index.get_pak_index(data_path)
+        if index is None:
+            self.report({'ERROR'}, "Data path does not exist")
+            return {'CANCELLED'}
+
+        entries = index.glob(self.pattern, batch_handler.BATCH_EXTENSIONS)
+        if not entries:
+            self.report({'ERROR'}, f"No .skin/.cgf files match {self.pattern}")
+            return {'CANCELLED'}
+        print(f"[BATCH] {len(entries)} files match {self.pattern}")
+
+        cache = extraction_cache.ExtractionCache(prefs.extraction_cache_size * 1024 * 1024)
+
+        try:
+            filepaths = cache.extract_many(index, entries, self.max_workers)
+            imported = batch_handler.batch_import(context, self, filepaths, self.max_workers)
+        except Exception as e:
+            print(f"[IMPORT ERROR] {e}")
+            self.report({'ERROR'}, f"Batch import failed: {e}")
+            return {'CANCELLED'}
+        finally:
+            cache.evict()
+
+        return {'FINISHED'} if imported else {'CANCELLED'}
+
 
 # Registration
-classes = [KCD2_OT_browse_skin_files, KCD2_OT_browse_cgf_files, KCD2_OT_browse_mtl_files]
+classes = [KCD2_OT_browse_skin_files, KCD2_OT_browse_cgf_files, KCD2_OT_browse_mtl_files, KCD2_OT_batch_import_paks]
 
 def register():
     for cls in classes:
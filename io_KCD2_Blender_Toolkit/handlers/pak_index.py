@@ -0,0 +1,298 @@
+import os
+import json
+import re
+import fnmatch
+import hashlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from . import cache_utils, pak_reader
+
+# Bump whenever the on-disk layout of the index changes.
+INDEX_VERSION = 2
+
+# Only members with these extensions are indexed. Split textures (.dds.1, .dds.a, ...) are bucketed under .dds.
+INDEXED_EXTENSIONS = ('.skin', '.cgf', '.cgfm', '.mtl', '.dds', '.chr', '.cdf', '.xml')
+
+# foo.dds, foo.dds.1 ... foo.dds.8, foo.dds.a, foo.dds.1a ...
+_DDS_PATTERN = re.compile(r'.\.dds(\.\d*a?)?$')
+
+# One member of a .pak. offset is the local header offset inside the pak.
+PakEntry = namedtuple("PakEntry", "path pak offset compressed_size file_size crc ext")
+
+# In-memory indexes shared by every operator, keyed by normalized data path.
+_indexes = {}
+
+
+def get_extension(path):
+    name = os.path.basename(path).lower()
+    if _DDS_PATTERN.search(name):
+        return '.dds'
+    return os.path.splitext(name)[1]
+
+
+def dds_stem(path):
+    """Returns the texture stem of a (split) .dds member, e.g. 'foo_diff' for '.../foo_diff.dds.1a', else None."""
+    name = os.path.basename(path).lower()
+    match = _DDS_PATTERN.search(name)
+    return name[:match.start() + 1] if match else None
+
+
+def _paks_in(folder):
+    return sorted(f for f in os.listdir(folder) if f.lower().endswith('.pak'))
+
+
+def list_mods(mods_dir):
+    """
+    Mod folders in load priority order: the ones named in Mods/mod_order.txt (one per line, first
+    line wins) in that order, then any others alphabetically. Without mod_order.txt, alphabetical.
+    """
+    mods = sorted(os.listdir(mods_dir))
+    order_file = os.path.join(mods_dir, "mod_order.txt")
+    if not os.path.isfile(order_file):
+        return mods
+    try:
+        with open(order_file, 'r', encoding='utf-8-sig') as f:
+            listed = [line.strip().lower() for line in f if line.strip()]
+    except OSError as e:
+        print(f"[WARN] Could not read {order_file}, using alphabetical mod order: {e}")
+        return mods
+    # Folder names are case-insensitive on Windows; mods not listed keep their alphabetical order after the listed ones.
+    rank = {name: i for i, name in reversed(list(enumerate(listed)))}
+    return sorted(mods, key=lambda mod: rank.get(mod.lower(), len(listed)))
+
+
+def list_pak_files(data_path):
+    """
+    Returns the paks to index as paths relative to data_path, highest priority first: paks of
+    installed mods (<game>/Mods/<mod>/Data/*.pak, in list_mods order) come before the base game
+    paks they override.
+    """
+    data_path = os.path.abspath(data_path)
+    mods_dir = os.path.join(os.path.dirname(data_path), "Mods")
+    mod_paks = []
+    if os.path.isdir(mods_dir):
+        for mod in list_mods(mods_dir):
+            mod_data = os.path.join(mods_dir, mod, "Data")
+            if os.path.isdir(mod_data):
+                mod_paks += [os.path.relpath(os.path.join(mod_data, f), data_path) for f in _paks_in(mod_data)]
+    return mod_paks + _paks_in(data_path)
+
+
+def pak_tier(pak_file):
+    """
+    Groups a pak from list_pak_files with the paks it ranks equal to: the Data folder of its mod,
+    or "" for the base game paks.
+    """
+    return os.path.dirname(pak_file)
+
+
+def read_pak_entries(pak_path):
+    """
+    Reads the central directory of one pak into plain [path, offset, csize, size, crc] rows,
+    keeping only INDEXED_EXTENSIONS. Runs inside the scan worker processes, so it must stay bpy-free.
+    """
+    directory = pak_reader.PakDirectory(pak_path)
+    rows = []
+    for i in range(len(directory)):
+        name = directory.name(i)
+        if get_extension(name) not in INDEXED_EXTENSIONS:
+            continue
+        rows.append([name, directory.header_offsets[i], directory.compressed_sizes[i], directory.file_sizes[i], directory.crcs[i]])
+    return rows
+
+
+def _read_paks(pak_paths):
+    """
+    Reads several paks, fanning them out over a process pool when there is more than one.
+    Paks that could not be read map to None.
+    """
+    results = {}
+    if len(pak_paths) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(len(pak_paths), os.cpu_count() or 1)) as pool:
+                for pak_path, rows in zip(pak_paths, pool.map(read_pak_entries, pak_paths)):
+                    results[pak_path] = rows
+            return results
+        except Exception as e:
+            # A corrupt pak or a worker that failed to start; redo the remainder serially to get per-pak errors.
+            print(f"[PAK INDEX] Parallel scan failed ({e}), falling back to serial scan")
+
+    for pak_path in pak_paths:
+        if pak_path in results:
+            continue
+        try:
+            results[pak_path] = read_pak_entries(pak_path)
+        except Exception as e:
+            print(f"[ERROR] Failed to read {os.path.basename(pak_path)}: {e}")
+            results[pak_path] = None
+    return results
+
+
+class PakIndex:
+    def __init__(self, data_path):
+        """
+        :param data_path: The KCD2 Data folder holding the .paks
+        """
+        self.data_path = data_path
+        self.cache_file = os.path.join(
+            cache_utils.get_cache_dir(),
+            f"pak_index_{hashlib.sha1(os.path.normcase(os.path.abspath(data_path)).encode('utf-8')).hexdigest()[:12]}.json"
+        )
+        self.paks = {}
+        self.pak_order = []
+        self.entries = []
+        self._by_ext = {}
+        self._by_path = {}
+        self._by_basename = {}
+        self._dds_families = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.isfile(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+            if cached.get("version") == INDEX_VERSION:
+                self.paks = cached.get("paks", {})
+        except Exception as e:
+            print(f"[PAK INDEX] Ignoring unreadable index cache: {e}")
+            self.paks = {}
+
+    def _save(self):
+        tmp_path = self.cache_file + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": INDEX_VERSION, "data_path": self.data_path, "paks": self.paks}, f)
+            os.replace(tmp_path, self.cache_file)
+        except Exception as e:
+            print(f"[PAK INDEX] Failed to write index cache: {e}")
+
+    def refresh(self):
+        """Rescans only the paks whose size or mtime changed since the index was written."""
+        pak_files = list_pak_files(self.data_path)
+        stale = {}
+
+        for pak_file in pak_files:
+            stat = os.stat(os.path.join(self.data_path, pak_file))
+            cached = self.paks.get(pak_file)
+            if not (cached and cached["size"] == stat.st_size and cached["mtime"] == stat.st_mtime):
+                stale[pak_file] = stat
+
+        changed = bool(stale)
+        if stale:
+            print(f"[PAK INDEX] Scanning {len(stale)} of {len(pak_files)} .pak files")
+            results = _read_paks([os.path.join(self.data_path, pak_file) for pak_file in stale])
+            for pak_file, stat in stale.items():
+                rows = results[os.path.join(self.data_path, pak_file)]
+                if rows is None:
+                    # Kept empty without size/mtime so the next refresh tries it again (e.g. after a file lock).
+                    self.paks[pak_file] = {"size": None, "mtime": None, "entries": []}
+                    print(f"[WARN] {pak_file} could not be read, its assets are missing until the next refresh")
+                    continue
+                self.paks[pak_file] = {"size": stat.st_size, "mtime": stat.st_mtime, "entries": rows}
+                print(f"[PAK INDEX] Indexed {pak_file}: {len(rows)} entries")
+
+        for pak_file in [p for p in self.paks if p not in pak_files]:
+            del self.paks[pak_file]
+            changed = True
+
+        if pak_files != self.pak_order:
+            self.pak_order = pak_files
+            changed = True
+
+        if changed or not self.entries:
+            self._build()
+        if changed:
+            self._save()
+        return self
+
+    def _build(self):
+        self.entries = []
+        self._by_ext = {}
+        self._by_path = {}
+        self._by_basename = {}
+        self._dds_families = {}
+        for pak_file in self.pak_order:
+            for path, offset, csize, size, crc in self.paks[pak_file]["entries"]:
+                entry = PakEntry(path, pak_file, offset, csize, size, crc, get_extension(path))
+                self.entries.append(entry)
+                self._by_ext.setdefault(entry.ext, []).append(entry)
+                norm = pak_reader.normalize_path(path)
+                # Paks are walked in priority order, so the first one holding a path wins.
+                self._by_path.setdefault(norm, entry)
+                self._by_basename.setdefault(norm.rsplit('/', 1)[-1], []).append(entry)
+                if entry.ext == '.dds':
+                    self._dds_families.setdefault(dds_stem(path), []).append(entry)
+        print(f"[PAK INDEX] {len(self.entries)} entries across {len(self.paks)} .pak files")
+
+    def find(self, path):
+        """
+        Resolves a (possibly partial) pak path to its entry. An exact path is a dict hit; a partial
+        path like 'foo.mtl' or 'humans/foo.mtl' goes through the basename map and a suffix check.
+        :return: the PakEntry, or None if nothing in the index matches
+        """
+        target = pak_reader.normalize_path(path)
+        entry = self._by_path.get(target)
+        if entry is not None:
+            return entry
+        for entry in self._by_basename.get(target.rsplit('/', 1)[-1], ()):
+            if pak_reader.normalize_path(entry.path).endswith(target):
+                return entry
+        return None
+
+    def dds_family(self, stem):
+        """
+        Returns every part (.dds, .dds.1 … .dds.N, .dds.a …) of the textures named stem across all paks,
+        highest priority pak first.
+        """
+        return self._dds_families.get(stem.lower(), [])
+
+    def entry_for(self, pak_file, path):
+        """Returns the entry for path inside a specific pak, or None."""
+        target = pak_reader.normalize_path(path)
+        for entry in self._by_basename.get(target.rsplit('/', 1)[-1], ()):
+            if entry.pak == pak_file and pak_reader.normalize_path(entry.path) == target:
+                return entry
+        return None
+
+    def glob(self, pattern, extensions):
+        """
+        Returns the entries whose path matches a glob such as 'objects/characters/humans/*.skin'
+        ('*' also crosses folders). Paths present in several paks are returned once.
+        """
+        pattern = pak_reader.normalize_path(pattern)
+        matches = {}
+        for ext in extensions:
+            for entry in self.files_with_extension(ext):
+                norm = pak_reader.normalize_path(entry.path)
+                if norm not in matches and fnmatch.fnmatchcase(norm, pattern):
+                    matches[norm] = entry
+        return [matches[norm] for norm in sorted(matches)]
+
+    def pak_path(self, entry):
+        return os.path.normpath(os.path.join(self.data_path, entry.pak))
+
+    def files_with_extension(self, ext):
+        return self._by_ext.get(ext.lower(), [])
+
+    def browse_items(self, ext):
+        """Returns (path, display name, "From: pak") tuples sorted by display name, as used by the browse dialogs."""
+        items = [
+            (entry.path, os.path.basename(os.path.normpath(entry.path)), f"From: {entry.pak}")
+            for entry in self.files_with_extension(ext)
+        ]
+        return sorted(items, key=lambda item: item[1].lower())
+
+
+def get_pak_index(data_path):
+    """Returns the shared, up to date index for data_path, or None if the folder does not exist."""
+    if not os.path.isdir(data_path):
+        print(f"[ERROR] Data path does not exist: {data_path}")
+        return None
+
+    key = os.path.normcase(os.path.abspath(data_path))
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = PakIndex(data_path)
+    return index.refresh()
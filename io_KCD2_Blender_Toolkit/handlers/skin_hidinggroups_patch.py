@@ -1,84 +1,38 @@
-import struct
-import os
+import numpy as np
+from . import chunk_file
 
-COLOR_TYPE = 0x1016  # chunk type for vertex colors
+COLOR_TYPE = chunk_file.CHUNK_DATA_STREAM  # chunk type for vertex colors
 
 def append_hiding_color_chunk(obj, skin_path):
     """
-    Reads the existing .skin, appends a new 0x1016 color chunk built
-    from objs HidingGroup1…8, and rewrites the file in place.
+    Appends a new 0x1016 color chunk built from objs HidingGroup1…8
+    to the existing .skin in place.
     """
     try:
         mesh = obj.data
 
         # --- 1) Build the per-vertex RGBA byte array for the mask ---
         vert_count = len(mesh.vertices)
-        # accumulate per-vertex alpha (average loop values)
-        sums = [0.0]*vert_count
-        counts = [0]*vert_count
-        vcol = mesh.vertex_colors["HidingMaskAlpha"].data
-        for loop in mesh.loops:
-            vidx = loop.vertex_index
-            a = vcol[loop.index].color[3]
-            sums[vidx] += a
-            counts[vidx] += 1
-        alphas = [ int(round((sums[i]/counts[i]) * 255)) for i in range(vert_count) ]
-
-        new_data = bytearray()
-        for a in alphas:
-            new_data += bytes((255, 255, 255, a))  # white RGB + mask alpha
-        new_data_size = len(new_data)
-
-        # --- 2) Read and parse the existing .skin ---
-        with open(skin_path, 'rb') as f:
-            skin = f.read()
-
-        if len(skin) < 16:
-            raise RuntimeError("Invalid .skin file")
-
-        # Header: magic (4s), version (I), chunk_count (I), table_offset (I)
-        magic      = skin[0:4]
-        version    = struct.unpack('<I', skin[4:8])[0]
-        chunk_cnt  = struct.unpack('<I', skin[8:12])[0]
-        tbl_off    = struct.unpack('<I', skin[12:16])[0]
-
-        entry_size = 16  # directory entries are: short, short, uint, uint, uint
-
-        # Offsets for directory and data
-        dir_start = tbl_off
-        dir_end   = dir_start + chunk_cnt * entry_size
-        directory = skin[dir_start:dir_end]
-        data_section = skin[dir_end:]
-
-        # --- 3) Build the new directory entry ---
-        # type=int16, ver=int16, id=uint32, size=uint32, offset=uint32
-        new_entry = struct.pack(
-            '<h h I I I',
-            COLOR_TYPE,
-            version,
-            0,
-            new_data_size,
-            len(skin)  # new data goes at end of existing file
-        )
-
-        # --- 4) Assemble and write the new .skin ---
-        out = bytearray()
-        # 4a) magic + version
-        out += magic
-        out += struct.pack('<I', version)
-        # 4b) updated chunk count
-        out += struct.pack('<I', chunk_cnt + 1)
-        # 4c) same table_offset
-        out += struct.pack('<I', tbl_off)
-        # 4d) old directory + new entry
-        out += directory
-        out += new_entry
-        # 4e) old data section + new data
-        out += data_section
-        out += new_data
-
-        with open(skin_path, 'wb') as f:
-            f.write(out)
+        loop_count = len(mesh.loops)
+        vertex_index = np.empty(loop_count, dtype=np.int32)
+        mesh.loops.foreach_get("vertex_index", vertex_index)
+        loop_colors = np.empty(loop_count * 4, dtype=np.float32)
+        mesh.vertex_colors["HidingMaskAlpha"].data.foreach_get("color", loop_colors)
+
+        # per-vertex alpha = average of its loop values; loose vertices get mask 0 (in no hiding group)
+        sums = np.bincount(vertex_index, weights=loop_colors[3::4], minlength=vert_count)
+        counts = np.bincount(vertex_index, minlength=vert_count)
+        alphas = np.divide(sums, counts, out=np.zeros(vert_count), where=counts > 0)
+
+        rgba = np.full((vert_count, 4), 255, dtype=np.uint8)  # white RGB + mask alpha
+        rgba[:, 3] = np.round(alphas * 255)
+        new_data = rgba.tobytes()
+
+        # --- 2) Append it as a new chunk ---
+        # Only the new data and the chunk table are written; the rest of the file stays untouched.
+        # The chunk itself is unchanged: the raw RGBA bytes, id 0, the file version as chunk version.
+        with chunk_file.ChunkFile(skin_path) as skin:
+            skin.append_chunk(COLOR_TYPE, skin.version, new_data, chunk_id=0)
 
         print("[Hiding Groups] Hiding groups appended.")
 
@@ -0,0 +1,81 @@
+"""
+Bulk PAK -> .blend/.dae conversion without the Blender UI:
+
+    blender --background --factory-startup --python io_KCD2_Blender_Toolkit/headless.py -- \\
+        --data <KCD2 Data> --filter "objects/characters/humans/*.skin" --out <dir> [--format blend|dae] [--shard 0/4]
+
+Each matching .skin/.cgf is imported into an empty scene and saved below --out, mirroring its
+folder inside the paks. Use --shard to split one job across several Blender processes.
+"""
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bpy
+import io_KCD2_Blender_Toolkit as toolkit
+from io_KCD2_Blender_Toolkit import cli
+from io_KCD2_Blender_Toolkit.handlers import extraction_cache, batch_handler
+
+
+class ConsoleReporter:
+    """Takes the place of an operator for the handlers' report() calls."""
+
+    def report(self, level, message):
+        print(f"[HEADLESS] {', '.join(sorted(level))}: {message}")
+
+
+def clear_scene():
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for collection in list(bpy.data.collections):
+        bpy.data.collections.remove(collection)
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
+
+def save_scene(out_path, file_format):
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    if file_format == "dae":
+        bpy.ops.wm.collada_export(filepath=out_path)
+    else:
+        bpy.ops.wm.save_as_mainfile(filepath=out_path, copy=True)
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(prog="headless.py", description="Bulk import KCD2 assets from the paks")
+    cli.add_common_arguments(parser)
+    parser.add_argument("--out", required=True, help="Output folder")
+    parser.add_argument("--format", choices=("blend", "dae"), default="blend")
+    args = parser.parse_args(argv)
+
+    if "io_KCD2_Blender_Toolkit" not in bpy.context.preferences.addons:
+        toolkit.register()
+
+    index, entries = cli.select_entries(args.data, args.filter, batch_handler.BATCH_EXTENSIONS, args.shard)
+    print(f"[HEADLESS] {len(entries)} files to import")
+
+    cache = extraction_cache.ExtractionCache()
+    filepaths = cache.extract_many(index, entries, args.workers)
+    converted = batch_handler.convert_files(filepaths, args.workers)
+
+    reporter = ConsoleReporter()
+    failed = []
+    for entry, item in zip(entries, converted):
+        clear_scene()
+        imported, item_failed = batch_handler.import_converted(bpy.context, reporter, [item])
+        if not imported:
+            failed.extend(item_failed)
+            continue
+        out_path = cli.output_path(args.out, entry, "." + args.format)
+        save_scene(out_path, args.format)
+        print(f"[HEADLESS] Saved {out_path}")
+
+    cache.evict()
+    print(f"[HEADLESS] Done: {len(entries) - len(failed)} saved, {len(failed)} failed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    sys.exit(main(argv))
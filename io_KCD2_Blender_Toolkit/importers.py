@@ -1,7 +1,24 @@
 import bpy
+import os
+from concurrent.futures import ThreadPoolExecutor
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, BoolProperty
-from .handlers import cgf_handler, skin_handler, collada_handler, glb_handler
+from bpy.props import StringProperty, BoolProperty, IntProperty, CollectionProperty
+from .handlers import cgf_handler, skin_handler, collada_handler, glb_handler, batch_handler, native_handler, chunk_file
+
+def import_native(operator, filepath, context):
+    """Tries the native chunk reader; returns False (after a warning) if the converter has to be used."""
+    try:
+        operator.dae_obj = native_handler.import_native(filepath, context, operator)
+    except chunk_file.ChunkFileError as e:
+        operator.report({'WARNING'}, f"Native reader could not read the file ({e}), using KCD2-Convertor")
+        return False
+    except Exception as e:
+        # native_handler has already removed whatever it created.
+        operator.report({'WARNING'}, f"Native import failed ({e}), using KCD2-Convertor")
+        return False
+    operator.report({'INFO'}, "Model imported successfully.")
+    return True
+
 
 class Importer_KCD2_Collada(bpy.types.Operator, ImportHelper):
     """Import KCD2 Collada"""
@@ -22,6 +39,7 @@ class Importer_KCD2_Collada(bpy.types.Operator, ImportHelper):
 
     def execute(self, context):
         filepath = self.filepath
+        collada_handler.begin_import()
         self.dae_obj = collada_handler.import_collada(filepath, context, self)
 
         if self.dae_obj:
@@ -47,28 +65,48 @@ class Importer_KCD2_SKIN(bpy.types.Operator, ImportHelper):
     dae_obj = None
     
     import_normals: BoolProperty(name="Import Normals", description="Import Normals", default=True)
+    import_hiding_groups: BoolProperty(
+        name="Import Hiding Groups",
+        description="Decode the vertex colour alpha into the HidingGroup1-8 vertex groups. Skipped when the alpha is the same everywhere",
+        default=False
+    )
+    use_native_reader: BoolProperty(
+        name="Native Reader (Experimental)",
+        description="Read the .skin geometry directly instead of converting it with KCD2-Convertor (the armature is still converted). Falls back to the converter for files it cannot read",
+        default=False
+    )
 
     def execute(self, context):
         skin_filepath = self.filepath
+        collada_handler.begin_import()
 
-        try:
-            glb_filepath = skin_handler.skin_to_glb(skin_filepath)
-            self.report({'INFO'}, "Converting Skin to glb...")
-            if not glb_filepath:
-                raise Exception("Failed to Convert Skin to glb")
-            
-            self.glb_obj = glb_handler.import_glb(glb_filepath, context, self)
-            self.report({'INFO'}, "Model imported successfully.")
+        if self.use_native_reader and import_native(self, skin_filepath, context):
+            return {'FINISHED'}
 
-            if self.glb_obj:
-                dae_filepath = skin_handler.skin_to_dae(skin_filepath)
-                self.report({'INFO'}, "Converting Skin to dae...")
-                if not dae_filepath:
-                    raise Exception("Failed to Convert Skin to dae")
+        try:
+            # Both conversions only need the .skin, so run the two converter processes side by side
+            # and import the glb armature while the dae conversion is still running.
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                glb_future = pool.submit(skin_handler.skin_to_glb, skin_filepath)
+                dae_future = pool.submit(skin_handler.skin_to_dae, skin_filepath)
+
+                glb_filepath = glb_future.result()
+                self.report({'INFO'}, "Converting Skin to glb...")
+                if not glb_filepath:
+                    raise Exception("Failed to Convert Skin to glb")
                 
-                self.dae_obj = collada_handler.import_collada(dae_filepath, context, self)
+                self.glb_obj = glb_handler.import_glb(glb_filepath, context, self)
                 self.report({'INFO'}, "Model imported successfully.")
 
+                if self.glb_obj:
+                    dae_filepath = dae_future.result()
+                    self.report({'INFO'}, "Converting Skin to dae...")
+                    if not dae_filepath:
+                        raise Exception("Failed to Convert Skin to dae")
+                    
+                    self.dae_obj = collada_handler.import_collada(dae_filepath, context, self, skin_filepath)
+                    self.report({'INFO'}, "Model imported successfully.")
+
 
         except Exception as e:
             self.report({'ERROR'}, f"Import failed: {e}")
@@ -93,9 +131,18 @@ class Importer_KCD2_CGF(bpy.types.Operator, ImportHelper):
     dae_obj = None
 
     import_normals: BoolProperty(name="Import normals", description="Import normals", default=False)
+    use_native_reader: BoolProperty(
+        name="Native Reader (Experimental)",
+        description="Read the .cgf directly instead of converting it with KCD2-Convertor. Falls back to the converter for files it cannot read",
+        default=False
+    )
 
     def execute(self, context):
         cgf_filepath = self.filepath
+        collada_handler.begin_import()
+
+        if self.use_native_reader and import_native(self, cgf_filepath, context):
+            return {'FINISHED'}
 
         try:
             dae_filepath = cgf_handler.cgf_to_dae(cgf_filepath)
@@ -103,7 +150,7 @@ class Importer_KCD2_CGF(bpy.types.Operator, ImportHelper):
             if not dae_filepath:
                 raise Exception("Failed to Convert CGF to dae")
             
-            collada_handler.import_collada(dae_filepath, context, self)
+            collada_handler.import_collada(dae_filepath, context, self, cgf_filepath)
             self.report({'INFO'}, "Model imported successfully.")
 
         except Exception as e:
@@ -113,13 +160,35 @@ class Importer_KCD2_CGF(bpy.types.Operator, ImportHelper):
         return {'FINISHED'}
 
 
+class Importer_KCD2_Batch(bpy.types.Operator, ImportHelper):
+    """Import many KCD2 .skin/.cgf files, converting them in parallel first"""
+    bl_idname = "import_scene.kcd2_batch"
+    bl_label = "Batch Import KCD2 files (.skin/.cgf)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filter_glob: StringProperty(default="*.skin;*.cgf", options={'HIDDEN'}, maxlen=255)
+    files: CollectionProperty(type=bpy.types.OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
+    directory: StringProperty(subtype='DIR_PATH')
+
+    max_workers: IntProperty(name="Parallel Conversions", description="Number of converter processes to run at once", default=4, min=1, max=32)
+
+    def execute(self, context):
+        filepaths = [os.path.join(self.directory, f.name) for f in self.files if f.name]
+        if not filepaths:
+            self.report({'ERROR'}, "No files selected")
+            return {'CANCELLED'}
+
+        if not batch_handler.batch_import(context, self, filepaths, self.max_workers):
+            return {'CANCELLED'}
+        return {'FINISHED'}
 
 
 # === Registration ===
 classes = (
     Importer_KCD2_Collada,
     Importer_KCD2_SKIN,
-    Importer_KCD2_CGF
+    Importer_KCD2_CGF,
+    Importer_KCD2_Batch
 )
 
 def register():
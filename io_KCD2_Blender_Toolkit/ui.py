@@ -17,6 +17,7 @@ class UI_ImportPAK(UI_BasePanel):
         layout.operator("kcd2.browse_skin_files", icon="OUTLINER_COLLECTION", text="Import Skin (.skin)")
         layout.operator("kcd2.browse_cgf_files", icon="OUTLINER_COLLECTION", text="Import CGF (.cgf)")
         layout.operator("kcd2.browse_mtl_files", icon="OUTLINER_COLLECTION", text="Import Material (.mtl)")
+        layout.operator("kcd2.batch_import_paks", icon="OUTLINER_COLLECTION", text="Batch Import (.skin/.cgf)")
 
 
 class UI_ImportLoose(UI_BasePanel):
@@ -28,6 +29,7 @@ class UI_ImportLoose(UI_BasePanel):
         layout.operator("import_scene.kcd2_skin", icon="FILE", text="Import Skin (.skin)")
         layout.operator("import_scene.kcd2_cgf", icon="FILE", text="Import CGF (.cgf)")
         layout.operator("import_scene.kcd2_collada", icon="FILE", text="Import COLLADA (.dae)")
+        layout.operator("import_scene.kcd2_batch", icon="FILE", text="Batch Import (.skin/.cgf)")
         
 def menu_func_import_skin(self, context):
     self.layout.operator("import_scene.kcd2_skin", text="KCD2 Skin (.skin)")
@@ -64,6 +66,7 @@ class UI_Materials(UI_BasePanel):
             layout.label( text="No mesh selected or mtl_directory not found")
 
         layout.operator("mtl.load_mtl", icon="MATERIAL", text="Load Material")
+        layout.operator("mtl.load_mtl", icon="MATERIAL", text="Load Material (Selected)").target = "SELECTED"
 
 
 class OBJECT_OT_hidinggroup_select(bpy.types.Operator):
@@ -0,0 +1,72 @@
+"""
+Writes sample.skin: a 0x746 chunk file with one triangle (P3S_C4B_T2S, 16-bit indices, QTangents,
+bone mapping), one subset, a 0x824 node translated to (1, 2, 3) and two compiled bones.
+Run from the repository root: python tests/data/make_sample.py
+"""
+import os
+import struct
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from io_KCD2_Blender_Toolkit.handlers import chunk_file
+
+
+def stream(chunk_id, stream_type, array):
+    data = np.ascontiguousarray(array).tobytes()
+    count = len(array)
+    return chunk_file.CHUNK_DATA_STREAM, 0x801, chunk_id, struct.pack('<7i', 0, stream_type, 0, count, len(data) // count, 0, 0) + data
+
+
+def bone(name, offset_parent, translation):
+    record = np.zeros(1, dtype=chunk_file._COMPILED_BONE)
+    record['name'] = name
+    record['offset_parent'] = offset_parent
+    record['bone_to_world'][0, :, :3] = np.eye(3)
+    record['bone_to_world'][0, :, 3] = translation
+    return record.tobytes()
+
+
+def build(path):
+    vertices = np.zeros(3, dtype=[('position', '<f2', 4), ('color', 'u1', 4), ('uv', '<f2', 2)])
+    vertices['position'][:, :3] = [[0, 0, 0], [1, 0, 0], [0, 1, 0]]
+    vertices['color'] = [10, 20, 30, 40]
+    vertices['uv'] = [[0, 0], [1, 0], [0, 1]]
+    chunks = [
+        stream(11, chunk_file.STREAM_P3S_C4B_T2S, vertices),
+        stream(12, chunk_file.STREAM_INDICES, np.array([0, 1, 2], np.uint16)),
+        stream(13, chunk_file.STREAM_QTANGENTS, np.array([[0, 0, 0, 32767]] * 3, np.int16)),
+        stream(14, chunk_file.STREAM_BONEMAPPING, np.array([[0, 1, 0, 0, 200, 55, 0, 0]] * 3, np.uint8)),
+        (chunk_file.CHUNK_MESH_SUBSETS, 0x800, 15,
+         struct.pack('<4i', 0, 1, 0, 0) + struct.pack('<5if3f', 0, 3, 0, 3, 0, 1.0, 0, 0, 0)),
+    ]
+    stream_ids = [0] * chunk_file.STREAM_SLOTS * 8
+    for slot, chunk_id in ((chunk_file.STREAM_P3S_C4B_T2S, 11), (chunk_file.STREAM_INDICES, 12),
+                           (chunk_file.STREAM_QTANGENTS, 13), (chunk_file.STREAM_BONEMAPPING, 14)):
+        stream_ids[slot * 8] = chunk_id
+    chunks.append((chunk_file.CHUNK_MESH, 0x801, 10,
+                   struct.pack('<7i', 0, 0, 3, 3, 1, 15, 0) + struct.pack(f'<{len(stream_ids)}i', *stream_ids)))
+
+    transform = np.eye(4)
+    transform[3, :3] = (1, 2, 3)
+    chunks.append((chunk_file.CHUNK_NODE, 0x824, 1,
+                   struct.pack('<64s4i4x16f', b'body', 10, -1, 0, 7, *transform.ravel())))
+    chunks.append((chunk_file.CHUNK_COMPILED_BONES, 0x800, 2,
+                   b"\0" * 32 + bone(b'Bip01', 0, [0, 0, 0]) + bone(b'Bip01 Spine', -1, [0, 0, 1])))
+    chunks.append((chunk_file.CHUNK_MTL_NAME, 0x800, 3, b'sample'.ljust(128, b"\0")))
+
+    data = bytearray(16)
+    table = []
+    for chunk_type, version, chunk_id, payload in chunks:
+        table.append((chunk_type, version, chunk_id, len(payload), len(data)))
+        data += payload
+    table_offset = len(data)
+    for entry in table:
+        data += struct.pack('<HHIII', *entry)
+    data[:16] = struct.pack('<4s3I', b"CrCh", 0x746, len(table), table_offset)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+if __name__ == "__main__":
+    build(os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample.skin"))
@@ -0,0 +1,80 @@
+import glob
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+from io_KCD2_Blender_Toolkit.handlers import chunk_file
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+SAMPLE = os.path.join(DATA_DIR, "sample.skin")
+COLLADA_NS = {"c": "http://www.collada.org/2005/11/COLLADASchema"}
+
+
+def read_sample():
+    with chunk_file.ChunkFile(SAMPLE) as cry_file:
+        return cry_file.read_meshes(), cry_file.read_nodes(), cry_file.read_bones(), cry_file.read_material_name()
+
+
+def test_sample_geometry():
+    meshes, _, _, _ = read_sample()
+    assert len(meshes) == 1
+    mesh = meshes[0]
+    assert mesh.positions.shape == (3, 3)
+    assert mesh.indices.tolist() == [0, 1, 2]
+    assert len(mesh.subsets) == 1
+    assert mesh.colors.shape == (3, 4)
+    assert mesh.uvs.shape == (3, 2)
+    assert np.allclose(mesh.normals, [[0, 0, 1]] * 3)
+    assert mesh.bone_ids.tolist() == [[0, 1, 0, 0]] * 3
+
+
+def test_sample_node_and_bones():
+    _, nodes, bones, mtl_name = read_sample()
+    assert mtl_name == "sample"
+    assert [(node.name, node.object_id, node.parent_id, node.material_id) for node in nodes] == [("body", 10, -1, 7)]
+    assert nodes[0].transform[3, :3].tolist() == [1, 2, 3]
+    assert [(bone.name, bone.parent) for bone in bones] == [("Bip01", -1), ("Bip01 Spine", 0)]
+
+
+def test_chunk_past_end_of_file(tmp_path):
+    data = bytearray(open(SAMPLE, 'rb').read())
+    _, _, _, table_offset = chunk_file._FILE_HEADER.unpack_from(data, 0)
+    chunk_type, version, chunk_id, size, _ = chunk_file._CHUNK_ENTRY.unpack_from(data, table_offset)
+    chunk_file._CHUNK_ENTRY.pack_into(data, table_offset, chunk_type, version, chunk_id, size, len(data))
+    broken = tmp_path / "broken.skin"
+    broken.write_bytes(data)
+    with pytest.raises(chunk_file.ChunkFileError):
+        chunk_file.ChunkFile(str(broken))
+
+
+def collada_counts(dae_path):
+    """Vertex, triangle and material subset counts over every mesh in a converter .dae."""
+    root = ET.parse(dae_path).getroot()
+    vertices = faces = subsets = 0
+    for mesh in root.iterfind(".//c:geometry/c:mesh", COLLADA_NS):
+        source_id = mesh.find("c:vertices/c:input[@semantic='POSITION']", COLLADA_NS).get("source").lstrip("#")
+        positions = mesh.find(f"c:source[@id='{source_id}']/c:float_array", COLLADA_NS)
+        vertices += int(positions.get("count")) // 3
+        for primitives in mesh.findall("c:triangles", COLLADA_NS) + mesh.findall("c:polylist", COLLADA_NS):
+            faces += int(primitives.get("count"))
+            subsets += 1
+    return vertices, faces, subsets
+
+
+# Real game files with the .dae KCD2-Convertor made from them, e.g. foo.skin + foo.dae.
+# Not shipped (game assets); drop pairs into tests/data to check the reader against the converter.
+CONVERTED_PAIRS = [path for path in sorted(glob.glob(os.path.join(DATA_DIR, "*.skin")) + glob.glob(os.path.join(DATA_DIR, "*.cgf")))
+                   if os.path.isfile(os.path.splitext(path)[0] + ".dae")]
+
+
+@pytest.mark.skipif(not CONVERTED_PAIRS, reason="no .skin/.cgf with converter output in tests/data")
+@pytest.mark.parametrize("path", CONVERTED_PAIRS, ids=os.path.basename)
+def test_matches_converter(path):
+    with chunk_file.ChunkFile(path) as cry_file:
+        meshes = cry_file.read_meshes()
+    native = (sum(len(mesh.positions) for mesh in meshes),
+              sum(len(mesh.indices) // 3 for mesh in meshes),
+              sum(len(mesh.subsets) if mesh.subsets is not None else 1 for mesh in meshes))
+    assert native == collada_counts(os.path.splitext(path)[0] + ".dae")